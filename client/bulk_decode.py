@@ -0,0 +1,291 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+import argparse
+import csv
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from package import Package, resolve_field_name
+from decode_cache import DecodeCache
+
+# Approximate number of capture bytes decoded per task.
+CHUNK_SIZE = 64 * 1024 * 1024
+
+def scan_frame_offsets(file_path):
+    """
+    Find the byte offset of every message in a capture file by walking the length headers.
+
+    Args:
+        file_path (str): The capture file path.
+
+    Returns:
+        array: The offset of every complete message, in file order. A truncated final
+               message is ignored.
+
+    Raises:
+        ValueError: If a length header is invalid.
+    """
+    offsets = array('Q')
+    file_size = os.path.getsize(file_path)
+    if file_size == 0:
+        return offsets
+
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = 0
+        while position + 5 <= file_size:
+            length = struct.unpack_from('>I', data, position)[0]
+            if length < 5:
+                raise ValueError(f"Invalid message length {length} at byte {position} of {file_path}")
+            if position + length > file_size:
+                break
+            offsets.append(position)
+            position += length
+    return offsets
+
+
+def split_frame_ranges(offsets, end_offset, chunk_size=CHUNK_SIZE):
+    """
+    Split a capture into byte ranges that start and end on message boundaries.
+
+    Args:
+        offsets (array): Message offsets from `scan_frame_offsets`.
+        end_offset (int): The offset just past the last complete message.
+        chunk_size (int): The approximate number of bytes per range.
+
+    Returns:
+        list: (start, end) byte ranges covering every message.
+    """
+    ranges = []
+    if not offsets:
+        return ranges
+
+    start = offsets[0]
+    for offset in offsets:
+        if offset - start >= chunk_size:
+            ranges.append((start, offset))
+            start = offset
+    ranges.append((start, end_offset))
+    return ranges
+
+
+def flattened_value(value):
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return value
+
+
+def range_rows(data, start, end, file_path, fields, decode_cache):
+    position = start
+    while position < end:
+        length = struct.unpack_from('>I', data, position)[0]
+        package = Package(data[position:position + length], decode_cache)
+        position += length
+
+        if package.type != 16 or not package.subpackage_list:
+            continue
+        flattened = package.get_flattened_variables()
+        timestamp = flattened.get("Robot_Mode_Data_timestamp")
+        if timestamp is None:
+            continue
+        yield [timestamp.total_seconds(), file_path] + [flattened_value(flattened.get(field)) for field in fields]
+
+
+def decode_range(file_path, start, end, fields, output_path):
+    """
+    Decode the robot state messages within a byte range into a CSV file sorted by timestamp.
+
+    This runs inside worker processes. Controller timestamps within a capture increase, so
+    rows are written as they are decoded. Only the rows after a timestamp that goes
+    backwards, e.g. after a controller restart, are held in memory and sorted.
+
+    Args:
+        file_path (str): The capture file path.
+        start (int): The offset of the range's first message.
+        end (int): The offset just past the range's last message.
+        fields (list): Flattened variable names written after the controller timestamp and
+                       the capture file path.
+        output_path (str): The CSV file written for this range.
+
+    Returns:
+        int: The number of rows written.
+    """
+    decode_cache = DecodeCache()
+    count = 0
+    previous = None
+    unsorted = None
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+         open(output_path, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+        for row in range_rows(data, start, end, file_path, fields, decode_cache):
+            count += 1
+            if unsorted is not None:
+                unsorted.append(row)
+            elif previous is not None and row[0] < previous:
+                unsorted = [row]
+            else:
+                writer.writerow(row)
+                previous = row[0]
+
+    if unsorted:
+        # Merges the rows written in order with the sorted remainder.
+        unsorted.sort(key=lambda row: row[0])
+        ordered_path = output_path + ".ordered"
+        os.replace(output_path, ordered_path)
+        with open(ordered_path, newline="") as ordered_file, open(output_path, "w", newline="") as output_file:
+            csv.writer(output_file).writerows(
+                heapq.merge(csv.reader(ordered_file), unsorted, key=lambda row: float(row[0])))
+        os.remove(ordered_path)
+    return count
+
+
+def first_robot_state_fields(file_path, offsets):
+    with open(file_path, "rb") as file:
+        for offset in offsets:
+            file.seek(offset)
+            length = struct.unpack('>I', file.read(4))[0]
+            file.seek(offset)
+            package = Package(file.read(length))
+            if package.type == 16 and package.subpackage_list:
+                return [name for name, value in package.get_flattened_variables().items()
+                        if isinstance(value, (bool, int, float, timedelta))]
+    return []
+
+
+def bulk_decode(file_paths, output_path, fields=None, jobs=None, chunk_size=CHUNK_SIZE) -> int:
+    """
+    Decode capture files across a process pool into one CSV file ordered by controller timestamp.
+
+    The second column, `source`, holds the capture file each row was decoded from, so rows of
+    different robots or sessions stay distinguishable after the merge.
+
+    Args:
+        file_paths (list): Capture file paths.
+        output_path (str): The CSV file to write.
+        fields (list): Flattened or unambiguous bare variable names; defaults to every
+                       numeric variable of the first robot state message.
+        jobs (int): The number of worker processes; defaults to the number of CPUs.
+        chunk_size (int): The approximate number of capture bytes per task.
+
+    Returns:
+        int: The number of rows written.
+    """
+    tasks = []
+    available_fields = None
+    for file_path in file_paths:
+        offsets = scan_frame_offsets(file_path)
+        if not offsets:
+            continue
+
+        if available_fields is None:
+            available_fields = first_robot_state_fields(file_path, offsets)
+
+        last_offset = offsets[-1]
+        with open(file_path, "rb") as file:
+            file.seek(last_offset)
+            end_offset = last_offset + struct.unpack('>I', file.read(4))[0]
+
+        for start, end in split_frame_ranges(offsets, end_offset, chunk_size):
+            tasks.append((file_path, start, end))
+
+    available_fields = available_fields or []
+    if fields is None:
+        fields = available_fields
+    resolved_fields = [resolve_field_name(field, available_fields) for field in fields]
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        part_paths = [os.path.join(temporary_directory, f"part_{index}.csv") for index in range(len(tasks))]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(decode_range, file_path, start, end, resolved_fields, part_path)
+                for (file_path, start, end), part_path in zip(tasks, part_paths)
+            ]
+            for future in futures:
+                future.result()
+
+        # Merges the sorted parts by timestamp, holding one row per part in memory.
+        part_files = [open(part_path, newline="") for part_path in part_paths]
+        try:
+            readers = [csv.reader(part_file) for part_file in part_files]
+            count = 0
+            with open(output_path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["controller_timestamp", "source"] + list(fields))
+                for row in heapq.merge(*readers, key=lambda row: float(row[0])):
+                    writer.writerow(row)
+                    count += 1
+        finally:
+            for part_file in part_files:
+                part_file.close()
+
+    return count
+
+
+def read_watch_list(file_path):
+    fields = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            package_name, var_name = line.strip().split(',')
+            fields.append(f"{package_name.replace(' ', '_')}_{var_name.replace(' ', '_')}")
+    return fields
+
+
+if __name__ == "__main__":
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Decode recorded primary interface captures into CSV")
+    parser.add_argument("captures", nargs="+", help="Capture files holding messages exactly as received")
+    parser.add_argument("-o", "--output", default=os.path.join("output", "bulk_decode.csv"), help="CSV file to write (default: output/bulk_decode.csv)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("-f", "--fields", nargs="+", default=None, help="Variables to write (default: every numeric variable)")
+    parser.add_argument("-w", "--watch_list", default=None, help="Read variables from a watch list file instead of --fields")
+    args = parser.parse_args()
+
+    fields = read_watch_list(args.watch_list) if args.watch_list else args.fields
+
+    output_directory = os.path.dirname(args.output)
+    if output_directory and not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+
+    try:
+        rows = bulk_decode(args.captures, args.output, fields, args.jobs)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Wrote {rows} rows to {args.output}")
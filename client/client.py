@@ -32,14 +32,20 @@ import argparse
 import socket
 import sys
 import os
-from package import Package
 from package_writer import PackageWriter
+from pipeline import receive_chunks, frame, decode
+from decode_cache import DecodeCache
+from layouts import LayoutDecoder
+from live_view import LiveViewServer
 
 # Parse command-line arguments
 parser = argparse.ArgumentParser(description="Client for receiving robot data")
 parser.add_argument("-i", "--ip_address", default=socket.gethostbyname(socket.gethostname()), help="IP address of the robot (default: local IP address)")
 parser.add_argument("-m", "--max_reports", type=int, default=10, help="Maximum number of reports to write (default: 10)")
 parser.add_argument("-c", "--custom_report", action="store_true", help="Generate custom report based on watch_list.txt")
+parser.add_argument("-l", "--live_view", type=int, default=None, metavar="PORT", help="Serve a live view of changed values on http://localhost:PORT")
+parser.add_argument("-b", "--memory_budget", type=float, default=None, metavar="MB", help="Evict the oldest reports when report buffers exceed this many megabytes")
+parser.add_argument("-s", "--spill", action="store_true", help="Append evicted reports to output/spill instead of discarding them")
 args = parser.parse_args()
 
 if args.custom_report:
@@ -62,15 +68,22 @@ with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as clientSocket:
         print(f"Could not connect to {HOST}:{PORT} Error: {e}")
         sys.exit(1)
 
-    writer = PackageWriter(args.max_reports, args.custom_report)
+    memory_budget = None if args.memory_budget is None else int(args.memory_budget * 1024 * 1024)
+    writer = PackageWriter(args.max_reports, args.custom_report, memory_budget, args.spill)
 
-    while True:
-        
-        # Receives message from UR controller.
-        new_message = clientSocket.recv(4096)
+    # Reuses subpackages that arrive unchanged, e.g. Configuration Data.
+    decode_cache = DecodeCache()
+
+    # Decodes subpackages with the layouts of the controller version reported on connect.
+    layout = LayoutDecoder()
 
-        # Creates package based on message received.
-        new_package = Package(new_message)
+    # Serves changed values to browsers without blocking this loop.
+    live_view = None
+    if args.live_view is not None:
+        live_view = LiveViewServer(port=args.live_view).start()
+
+    # Receives messages from UR controller and creates a package for each.
+    for new_package in decode(frame(receive_chunks(clientSocket)), decode_cache, layout):
 
         # Writes subpackage content to file.
         writer.append_package_to_file(new_package)
@@ -79,6 +92,9 @@ with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as clientSocket:
         if writer.custom_reports_enabled == True:
             writer.append_custom_report(new_package)
 
+        if live_view is not None:
+            live_view.publish(new_package)
+
         # Demonstrates accessing subpackage data.
         # subpackage = new_package.get_subpackage("Robot Mode Data")
         # if subpackage is not None:
@@ -0,0 +1,123 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+from collections import OrderedDict
+from subpackage import SubPackage
+from memory import MemoryUsage, deep_sizeof
+
+# (package type, subpackage type) pairs whose bytes rarely change between packages:
+# Master Board Data, Kinematics Info, Configuration Data and Calibration Data.
+RARELY_CHANGING_SUBPACKAGES = {(16, 3), (16, 5), (16, 6), (16, 9)}
+
+class DecodeCache:
+    """
+    A bounded least-recently-used cache of decoded subpackages keyed by their raw bytes.
+
+    Subpackages such as Configuration Data are usually byte-for-byte identical from one
+    package to the next. When the same bytes arrive again, the subpackage object decoded
+    the first time is returned instead of being decoded again, so every package holding it
+    shares one object. Shared subpackages must therefore be treated as read-only.
+
+    Attributes:
+        maxsize (int): The maximum number of decoded subpackages kept.
+        subpackage_types (set): The (package type, subpackage type) pairs that are cached.
+        hits (int): The number of subpackages reused.
+        misses (int): The number of cacheable subpackages decoded.
+
+    Methods:
+        create_subpackage: Return a cached subpackage or decode and cache a new one.
+        hit_rate: Report the fraction of cacheable subpackages that were reused.
+        clear: Remove every cached subpackage and reset the counters.
+        memory_usage: Report the bytes held by the cached subpackages.
+    """
+
+    def __init__(self, maxsize=64, subpackage_types=RARELY_CHANGING_SUBPACKAGES):
+        self.maxsize = maxsize
+        self.subpackage_types = set(subpackage_types)
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def create_subpackage(self, package_type, subpackage_data, subpackage_length, subpackage_type, layout=None):
+        """
+        Return a cached subpackage or decode and cache a new one.
+
+        Takes the same arguments as `SubPackage.create_subpackage`, followed by an optional
+        LayoutDecoder used to decode. Entries are keyed by the decoder's layout table as well as
+        the bytes, so a version switch never reuses subpackages decoded with another table.
+        Subpackage types that are not cached are decoded directly.
+
+        Returns:
+            SubPackage: The decoded subpackage, possibly shared with earlier packages.
+        """
+        factory = layout.create_subpackage if layout is not None else SubPackage.create_subpackage
+        if (package_type, subpackage_type) not in self.subpackage_types:
+            return factory(package_type, subpackage_data, subpackage_length, subpackage_type)
+
+        # Cached subpackages own a copy of their bytes instead of a view that keeps a whole
+        # package's robot data alive.
+        subpackage_data = bytes(subpackage_data)
+        key = (package_type, subpackage_type, subpackage_data, layout.version if layout is not None else None)
+        subpackage = self.entries.get(key)
+        if subpackage is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return subpackage
+
+        subpackage = factory(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.entries[key] = subpackage
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        self.misses += 1
+        return subpackage
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def memory_usage(self) -> list:
+        usage = {}
+        seen = set()
+        for (package_type, _, _, _), subpackage in self.entries.items():
+            items, nbytes = usage.get(package_type, (0, 0))
+            usage[package_type] = (items + 1, nbytes + deep_sizeof(subpackage, seen))
+        return [MemoryUsage(None, "decode_cache", package_type, items, nbytes) for package_type, (items, nbytes) in usage.items()]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return f"DECODE CACHE: {len(self.entries)}/{self.maxsize} entries, {self.hits} hits, {self.misses} misses, {self.hit_rate():.1%} hit rate"
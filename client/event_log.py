@@ -0,0 +1,264 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+# Robot message type of Error Code Messages; Key and Safety Mode Messages also carry codes.
+ERROR_CODE_MESSAGE = 6
+
+class EventLog:
+    """
+    An append-only log of robot messages and program state messages with an index.
+
+    Every event is appended to `events.log` as one JSON line, and its position is recorded
+    in an SQLite index, `events.db`, by receive time, source, message type, code and argument
+    and program run.
+    Queries such as "all C204 errors last week" or "every run of program X" are answered
+    from the index and only the matching lines are read back from the log.
+
+    Program runs are delimited by the key messages the controller sends when a program
+    starts and stops; events received in between are tagged with the run.
+
+    Attributes:
+        directory (str): The directory holding the log and its index.
+        current_run (int): The id of the program run in progress, or None.
+
+    Methods:
+        append: Record the message carried by a package.
+        events: Retrieve events filtered by time, source, message type, code and run.
+        runs: Retrieve program runs, optionally for one program.
+        close: Close the log and its index.
+    """
+
+    def __init__(self, directory=os.path.join("output", "events")):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.log = open(os.path.join(directory, "events.log"), "a+b")
+        self.index = sqlite3.connect(os.path.join(directory, "events.db"))
+        self.index.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                offset INTEGER PRIMARY KEY, length INTEGER, received REAL, source INTEGER,
+                package_type INTEGER, message_type INTEGER, code INTEGER, run INTEGER,
+                argument INTEGER);
+            CREATE INDEX IF NOT EXISTS events_received ON events (received);
+            CREATE INDEX IF NOT EXISTS events_source ON events (source, received);
+            CREATE INDEX IF NOT EXISTS events_run ON events (run);
+            CREATE TABLE IF NOT EXISTS runs (
+                run INTEGER PRIMARY KEY, program TEXT, started REAL, stopped REAL);
+            CREATE INDEX IF NOT EXISTS runs_program ON runs (program, started);
+        """)
+
+        # Indexes written before message codes were qualified by type and argument gain the column.
+        columns = [row[1] for row in self.index.execute("PRAGMA table_info(events)")]
+        if "argument" not in columns:
+            self.index.execute("ALTER TABLE events ADD COLUMN argument INTEGER")
+        self.index.execute("DROP INDEX IF EXISTS events_code")
+        self.index.execute(
+            "CREATE INDEX IF NOT EXISTS events_message_code ON events (message_type, code, argument, received)")
+        self.index.commit()
+
+        # A run left open by a previous session continues until its stop message arrives.
+        row = self.index.execute("SELECT run FROM runs WHERE stopped IS NULL ORDER BY run DESC LIMIT 1").fetchone()
+        self.current_run = row[0] if row else None
+
+    def append(self, package) -> bool:
+        """
+        Record the message carried by a robot message or program state package.
+
+        Args:
+            package (Package): A decoded package.
+
+        Returns:
+            bool: True if the package carried a decoded message and was recorded.
+        """
+        if package.type not in (20, 25) or not package.subpackage_list:
+            return False
+        message = package.subpackage_list[0]
+        if not hasattr(message, "header_format"):
+            return False
+
+        variables = message.subpackage_variables._asdict()
+        received = package.received_timestamp.timestamp()
+        title = variables.get("messageTitle", "")
+
+        if title.startswith("PROGRAM_") and title.endswith("_STARTED"):
+            cursor = self.index.execute(
+                "INSERT INTO runs (program, started) VALUES (?, ?)", (variables.get("keyTextMessage"), received))
+            self.current_run = cursor.lastrowid
+
+        record = {
+            "received": package.received_timestamp.isoformat(),
+            "package_type": package.type,
+            "name": message.subpackage_name,
+            "run": self.current_run
+        }
+        for name, value in variables.items():
+            record[name] = value.total_seconds() if isinstance(value, timedelta) else value
+        line = (json.dumps(record) + "\n").encode()
+
+        self.log.seek(0, os.SEEK_END)
+        offset = self.log.tell()
+        self.log.write(line)
+        self.log.flush()
+
+        self.index.execute(
+            "INSERT INTO events (offset, length, received, source, package_type, message_type, code, argument, run)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (offset, len(line), received, variables.get("source"), package.type, message.subpackage_type,
+             variables.get("robotMessageCode"), variables.get("robotMessageArgument"), self.current_run))
+
+        if title.startswith("PROGRAM_") and title.endswith("_STOPPED") and self.current_run is not None:
+            self.index.execute("UPDATE runs SET stopped = ? WHERE run = ?", (received, self.current_run))
+            self.current_run = None
+
+        self.index.commit()
+        return True
+
+    def events(self, start=None, end=None, source=None, code=None, run=None, limit=None,
+               message_type=None) -> list:
+        """
+        Retrieve events filtered by time, source, message type, code and run, oldest first.
+
+        Args:
+            start (datetime): The earliest receive time, or None.
+            end (datetime): The latest receive time, or None.
+            source (int): The message source, or None.
+            code: The message code as an int or as shown by PolyScope, e.g. "C204", or None.
+                  An argument suffix, e.g. "C204A3", also matches the message argument.
+            run (int): The program run id, or None.
+            limit (int): The maximum number of events, or None.
+            message_type (int): The robot message type, or None. Defaults to Error Code
+                                Messages when a code is given, since other messages reuse
+                                the same code numbers.
+
+        Returns:
+            list: The matching events as dictionaries.
+        """
+        if code is not None and message_type is None:
+            message_type = ERROR_CODE_MESSAGE
+
+        conditions = []
+        parameters = []
+        if start is not None:
+            conditions.append("received >= ?")
+            parameters.append(start.timestamp())
+        if end is not None:
+            conditions.append("received <= ?")
+            parameters.append(end.timestamp())
+        if source is not None:
+            conditions.append("source = ?")
+            parameters.append(source)
+        if message_type is not None:
+            conditions.append("message_type = ?")
+            parameters.append(message_type)
+        if code is not None:
+            code, argument = parse_code(code)
+            conditions.append("code = ?")
+            parameters.append(code)
+            if argument is not None:
+                conditions.append("argument = ?")
+                parameters.append(argument)
+        if run is not None:
+            conditions.append("run = ?")
+            parameters.append(run)
+
+        query = "SELECT offset, length FROM events"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY received, offset"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        events = []
+        for offset, length in self.index.execute(query, parameters):
+            self.log.seek(offset)
+            events.append(json.loads(self.log.read(length)))
+        return events
+
+    def runs(self, program=None) -> list:
+        """
+        Retrieve program runs, oldest first.
+
+        Args:
+            program (str): The program name reported when it started, or None for every program.
+
+        Returns:
+            list: Tuples of (run id, program, started, stopped); times are datetimes and
+                  stopped is None while the run is in progress.
+        """
+        query = "SELECT run, program, started, stopped FROM runs"
+        parameters = []
+        if program is not None:
+            query += " WHERE program = ?"
+            parameters.append(program)
+        query += " ORDER BY started"
+
+        runs = []
+        for run, name, started, stopped in self.index.execute(query, parameters):
+            stopped = datetime.fromtimestamp(stopped) if stopped is not None else None
+            runs.append((run, name, datetime.fromtimestamp(started), stopped))
+        return runs
+
+    def close(self):
+        self.log.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_code(code) -> tuple:
+    """
+    Convert a message code as shown by PolyScope, e.g. "C204" or "C204A3", to its numbers.
+
+    Args:
+        code: An int, or a string with an optional letter prefix and argument suffix.
+
+    Returns:
+        tuple: The message code and the argument, which is None if not given.
+    """
+    if isinstance(code, int):
+        return code, None
+    match = re.fullmatch(r"[A-Za-z]*(\d+)(?:[Aa](\d+))?", code.strip())
+    if match is None:
+        raise ValueError(f"Invalid message code: {code}")
+    argument = match.group(2)
+    return int(match.group(1)), None if argument is None else int(argument)
@@ -0,0 +1,257 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from package import resolve_field_name
+from memory import MemoryUsage
+
+class RingHistory:
+    """
+    A bounded history of every numeric variable in preallocated NumPy arrays.
+
+    Each flattened variable, e.g. `Joint_Data_Joint2_T_motor`, owns one row of a single
+    float64 array. Every sample is written twice, at `slot` and `slot + capacity`, so the
+    most recent `capacity` samples are always contiguous in memory. Range queries are then
+    a bisection on the timestamp row and return views rather than copies. Memory use is
+    fixed once the variables are known and is reported by `nbytes`.
+
+    Samples are indexed by the controller timestamp from Robot Mode Data, in seconds, and
+    by the host receive time, `Package.received_monotonic`. The receive time comes from the
+    monotonic clock because the wall clock can step backwards, e.g. when NTP corrects it,
+    which would leave the row unsorted. Packages without Robot Mode Data are not
+    stored. Queries need increasing controller timestamps; when a timestamp goes backwards,
+    e.g. after a controller restart, the stored samples are discarded and `resets` counts it.
+
+    Attributes:
+        capacity (int): The maximum number of samples kept.
+        fields (list): The flattened names of the stored variables. When not given at
+                       creation, every numeric variable of the first stored package is used.
+                       Requested names may be bare; they are resolved against the first
+                       stored package, which raises KeyError for unknown names.
+        count (int): The total number of samples appended since creation or the last reset.
+        resets (int): The number of times the controller timestamp went backwards.
+
+    Methods:
+        append: Store the numeric variables of a package.
+        query: Retrieve a variable's samples within a time range as array views.
+        latest: Retrieve a variable's most recent value.
+        timestamps: Retrieve the timestamps of every stored sample as an array view.
+        nbytes: Report the bytes held by the history's arrays.
+        reset: Discard every stored sample.
+        memory_usage: Report the bytes held for a MemoryAccountant.
+    """
+
+    CLOCKS = ("controller", "received")
+
+    def __init__(self, capacity, fields=None):
+        self.capacity = capacity
+        self.fields = None
+        self.count = 0
+        self.resets = 0
+        self._resolved = False
+        self._columns = {}
+        self._data = None
+        self._row = None
+
+        # Requested variables are allocated before any package arrives.
+        if fields is not None:
+            self._allocate(list(fields))
+
+    def _allocate(self, fields):
+        self.fields = fields
+
+        # Rows 0 and 1 hold the controller and received timestamps.
+        self._columns = {clock: index for index, clock in enumerate(self.CLOCKS)}
+        for index, field in enumerate(fields, start=len(self.CLOCKS)):
+            self._columns[field] = index
+
+        self._data = np.full((len(self._columns), 2 * self.capacity), np.nan)
+        self._row = np.empty(len(self._columns))
+
+    def _numeric_fields(self, flattened):
+        return [name for name, value in flattened.items() if isinstance(value, (bool, int, float, timedelta))]
+
+    def append(self, package) -> bool:
+        """
+        Store the numeric variables of a package.
+
+        Args:
+            package (Package): A decoded robot state package.
+
+        Returns:
+            bool: True if the package was stored, False if it carried no Robot Mode Data.
+        """
+        flattened = package.get_flattened_variables()
+        controller_timestamp = flattened.get("Robot_Mode_Data_timestamp")
+        if controller_timestamp is None:
+            return False
+
+        # Variables are fixed by the first package unless they were requested up front.
+        if self._data is None:
+            self._allocate(self._numeric_fields(flattened))
+        if not self._resolved:
+            self._resolve(flattened)
+
+        row = self._row
+        row[0] = controller_timestamp.total_seconds()
+        if self.count and row[0] < self._data[0, (self.count - 1) % self.capacity]:
+            self.reset()
+            self.resets += 1
+        row[1] = package.received_monotonic
+        for index, field in enumerate(self.fields, start=len(self.CLOCKS)):
+            value = flattened.get(field)
+            if isinstance(value, timedelta):
+                value = value.total_seconds()
+            elif not isinstance(value, (bool, int, float)):
+                value = np.nan
+            row[index] = value
+
+        slot = self.count % self.capacity
+        self._data[:, slot] = row
+        self._data[:, slot + self.capacity] = row
+        self.count += 1
+        return True
+
+    def _resolve(self, flattened):
+        # Requested names become flattened names; the requested spelling keeps working in queries.
+        resolved = [resolve_field_name(field, flattened) for field in self.fields]
+        for field, flattened_name in zip(self.fields, resolved):
+            self._columns[flattened_name] = self._columns[field]
+        self.fields = resolved
+        self._resolved = True
+
+    def reset(self):
+        """
+        Discard every stored sample, keeping the allocated arrays.
+        """
+        self.count = 0
+        if self._data is not None:
+            self._data.fill(np.nan)
+
+    def _window(self):
+        if self._data is None:
+            return slice(0, 0)
+        if self.count < self.capacity:
+            return slice(0, self.count)
+        start = self.count % self.capacity
+        return slice(start, start + self.capacity)
+
+    def _column(self, field):
+        if self._data is None:
+            raise KeyError(f"Unknown variable: {field}")
+        if field not in self._columns:
+            field = resolve_field_name(field, self.fields)
+        return self._data[self._columns[field]]
+
+    def timestamps(self, clock="controller"):
+        """
+        Retrieve the timestamps of every stored sample, oldest first.
+
+        Args:
+            clock (str): "controller" for Robot Mode Data timestamps or "received" for host
+                         monotonic receive times.
+
+        Returns:
+            ndarray: A read-only view of the timestamps in seconds.
+        """
+        if clock not in self.CLOCKS:
+            raise ValueError(f"Unknown clock: {clock}")
+        return self._readonly(self._column(clock)[self._window()])
+
+    def query(self, field, start=None, end=None, clock="controller"):
+        """
+        Retrieve a variable's samples within an inclusive time range.
+
+        Args:
+            field (str): A flattened or unambiguous bare variable name, e.g. `Joint2_T_motor`.
+            start: The range start in seconds, a timedelta, or a datetime for the received clock.
+                   Datetimes are converted to the monotonic clock with its current offset from
+                   the wall clock. None leaves the range open.
+            end: The range end in the same units as `start`. None leaves the range open.
+            clock (str): "controller" or "received".
+
+        Returns:
+            tuple: Read-only array views of the timestamps and the values.
+        """
+        timestamps = self.timestamps(clock)
+        values = self._column(field)[self._window()]
+
+        first = 0 if start is None else np.searchsorted(timestamps, self._seconds(start), side="left")
+        last = len(timestamps) if end is None else np.searchsorted(timestamps, self._seconds(end), side="right")
+
+        return timestamps[first:last], self._readonly(values[first:last])
+
+    def latest(self, field):
+        """
+        Retrieve a variable's most recent value.
+
+        Args:
+            field (str): A flattened or unambiguous bare variable name.
+
+        Returns:
+            float: The most recent value, or None if the history is empty.
+        """
+        if self.count == 0:
+            return None
+        return float(self._column(field)[(self.count - 1) % self.capacity])
+
+    def nbytes(self) -> int:
+        """
+        Report the bytes held by the history's arrays.
+
+        Returns:
+            int: The size of the preallocated arrays in bytes.
+        """
+        if self._data is None:
+            return 0
+        return self._data.nbytes + self._row.nbytes
+
+    def memory_usage(self) -> list:
+        return [MemoryUsage(None, "history", 16, len(self), self.nbytes())]
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @staticmethod
+    def _seconds(value):
+        if isinstance(value, timedelta):
+            return value.total_seconds()
+        if isinstance(value, datetime):
+            return value.timestamp() - time.time() + time.monotonic()
+        return value
+
+    @staticmethod
+    def _readonly(view):
+        view = view.view()
+        view.flags.writeable = False
+        return view
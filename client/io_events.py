@@ -0,0 +1,270 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import numpy as np
+from collections import namedtuple
+
+# Bit words tracked for edges as signal name: (subpackage name, variable name, word width).
+# Tool digital inputs and outputs are bits 16 and 17 of the Master Board Data words.
+IO_SIGNALS = {
+    "digitalInputBits": ("Master Board Data", "digitalInputBits", 32),
+    "digitalOutputBits": ("Master Board Data", "digitalOutputBits", 32),
+    "euromapInputBits": ("Master Board Data", "euromapInputBits", 32),
+    "euromapOutputBits": ("Master Board Data", "euromapOutputBits", 32)
+}
+
+# Pin name prefixes by signal, as (first bit, prefix) ranges in ascending order.
+PIN_PREFIXES = {
+    "digitalInputBits": [(0, "DI"), (8, "CI"), (16, "TI")],
+    "digitalOutputBits": [(0, "DO"), (8, "CO"), (16, "TO")],
+    "euromapInputBits": [(0, "EI")],
+    "euromapOutputBits": [(0, "EO")]
+}
+
+RISING = "rising"
+FALLING = "falling"
+
+def pin_name(signal, pin) -> str:
+    """
+    Name a pin the way PolyScope does, e.g. bit 9 of `digitalInputBits` is `CI1` and bit 16
+    is the tool input `TI0`.
+
+    Args:
+        signal (str): The signal name.
+        pin (int): The bit number.
+
+    Returns:
+        str: The pin name, or the signal name and bit number for unknown signals.
+    """
+    name = f"{signal}[{pin}]"
+    for first_bit, prefix in PIN_PREFIXES.get(signal, []):
+        if pin >= first_bit:
+            name = f"{prefix}{pin - first_bit}"
+    return name
+
+
+def controller_seconds(package):
+    robot_mode_data = package.get_subpackage("Robot Mode Data")
+    if robot_mode_data is None:
+        return None
+    return robot_mode_data.subpackage_variables.timestamp.total_seconds()
+
+
+class IOEdgeDetector:
+    """
+    Turns successive I/O bit words into per-pin rising and falling edge events.
+
+    Each robot state package's bit words are XORed with the previous package's, so the cost
+    of a package is independent of the number of pins and only changed pins produce events.
+    The first package of each signal sets the reference state and produces no events. Signals
+    a package does not carry, e.g. Euromap67 bits without an installed interface, are skipped.
+
+    Attributes:
+        signals (dict): The tracked signals, in the form of `IO_SIGNALS`.
+        state (dict): The last bit word seen per signal.
+        events (int): The number of events produced.
+
+    Methods:
+        process: Produce the edge events of a package.
+    """
+
+    def __init__(self, signals=IO_SIGNALS):
+        self.signals = dict(signals)
+        self.state = {}
+        self.events = 0
+
+    def process(self, package) -> list:
+        """
+        Produce the edge events of a package.
+
+        Args:
+            package (Package): A decoded package; packages other than robot state messages
+                               produce no events.
+
+        Returns:
+            list: IOEvent tuples ordered by signal and pin.
+        """
+        events = []
+        if package.type != 16:
+            return events
+
+        timestamp = None
+        for signal, (subpackage_name, variable_name, width) in self.signals.items():
+            subpackage = package.get_subpackage(subpackage_name)
+            if subpackage is None:
+                continue
+            word = getattr(subpackage.subpackage_variables, variable_name, None)
+            if not isinstance(word, int):
+                continue
+
+            previous = self.state.get(signal)
+            self.state[signal] = word
+            if previous is None:
+                continue
+
+            changed = (previous ^ word) & ((1 << width) - 1)
+            if not changed:
+                continue
+            if timestamp is None:
+                timestamp = controller_seconds(package)
+            while changed:
+                lowest = changed & -changed
+                edge = RISING if word & lowest else FALLING
+                events.append(IOEvent(timestamp, signal, lowest.bit_length() - 1, edge))
+                changed ^= lowest
+
+        self.events += len(events)
+        return events
+
+
+def io_events(packages, detector=None):
+    """
+    Reduce a package stream to I/O edge events; usable as a pipeline stage.
+
+    Args:
+        packages (iterable): Decoded packages.
+        detector (IOEdgeDetector): The detector to use; a new one tracking `IO_SIGNALS` by default.
+
+    Yields:
+        IOEvent: One event per pin edge.
+    """
+    detector = detector or IOEdgeDetector()
+    for package in packages:
+        yield from detector.process(package)
+
+
+def unpack_bits(words, width=32):
+    """
+    Expand bit words into one column per pin.
+
+    Args:
+        words (array_like): Bit words, e.g. a `RingHistory` query of `digitalInputBits`.
+        width (int): The number of bits per word; a multiple of 8 up to 64.
+
+    Returns:
+        numpy.ndarray: A (samples, width) uint8 array whose column i holds bit i.
+
+    Raises:
+        ValueError: If a word is NaN or infinite, which has no bit pattern.
+    """
+    words = np.asarray(words)
+    if words.dtype.kind == "f" and not np.isfinite(words).all():
+        raise ValueError("Bit words must be finite; drop NaN samples before unpacking.")
+    words = words.astype("<u8")
+    bytes_per_word = width // 8
+    octets = words.view(np.uint8).reshape(-1, 8)[:, :bytes_per_word]
+    return np.unpackbits(octets, axis=1, bitorder="little")
+
+
+def edges(timestamps, words, signal, width=32) -> list:
+    """
+    Find every pin edge in a recorded history of bit words.
+
+    Produces the same events as feeding the samples through an `IOEdgeDetector`, without a
+    Python loop over the samples. Samples whose word is NaN, e.g. `RingHistory` rows recorded
+    before the signal was present, are dropped so they do not produce edges.
+
+    Args:
+        timestamps (array_like): Controller timestamps in seconds, one per word.
+        words (array_like): The recorded bit words.
+        signal (str): The signal name stored in the events.
+        width (int): The number of bits per word.
+
+    Returns:
+        list: IOEvent tuples ordered by time and pin.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    words = np.asarray(words)
+    if words.dtype.kind == "f":
+        finite = np.isfinite(words)
+        timestamps, words = timestamps[finite], words[finite]
+    bits = unpack_bits(words, width).astype(np.int8)
+    if len(bits) < 2:
+        return []
+
+    transitions = np.diff(bits, axis=0)
+    rows, pins = np.nonzero(transitions)
+    rising = transitions[rows, pins] > 0
+    return [IOEvent(float(timestamp), signal, int(pin), RISING if is_rising else FALLING)
+            for timestamp, pin, is_rising in zip(timestamps[rows + 1], pins, rising)]
+
+
+def pulse_durations(events, signal, pin) -> np.ndarray:
+    """
+    Measure how long a pin stays high, e.g. how long a gripper output is held.
+
+    Args:
+        events (iterable): IOEvent tuples ordered by time.
+        signal (str): The signal name.
+        pin (int): The bit number.
+
+    Returns:
+        numpy.ndarray: The seconds from each rising edge to the following falling edge.
+    """
+    durations = []
+    rising_time = None
+    for event in events:
+        if event.signal != signal or event.pin != pin:
+            continue
+        if event.edge == RISING:
+            rising_time = event.timestamp
+        elif rising_time is not None:
+            durations.append(event.timestamp - rising_time)
+            rising_time = None
+    return np.array(durations, dtype=float)
+
+
+def cycle_times(events, signal, pin, edge=RISING) -> np.ndarray:
+    """
+    Measure the time between successive edges of one direction on a pin, e.g. part-present
+    sensor cycles.
+
+    Args:
+        events (iterable): IOEvent tuples ordered by time.
+        signal (str): The signal name.
+        pin (int): The bit number.
+        edge (str): RISING or FALLING.
+
+    Returns:
+        numpy.ndarray: The seconds between successive matching edges.
+    """
+    timestamps = [event.timestamp for event in events
+                  if event.signal == signal and event.pin == pin and event.edge == edge]
+    return np.diff(np.array(timestamps, dtype=float))
+
+
+########################### NAMED TUPLES ###########################
+IOEvent = namedtuple("IOEvent", [
+    "timestamp",
+    "signal",
+    "pin",
+    "edge"
+])
@@ -0,0 +1,363 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import numpy as np
+from collections import namedtuple
+
+# Number of samples chained per pass in KinematicsEngine.forward_kinematics.
+FORWARD_KINEMATICS_BLOCK_SIZE = 2048
+
+class KinematicsEngine:
+    """
+    A vectorized forward kinematics and derived-metric engine.
+
+    This class takes the Denavit-Hartenberg parameters decoded by `KinematicsInfo` or
+    `ConfigurationData` and evaluates batches of joint states in a single NumPy pass.
+    Every method accepts arrays shaped (samples, 6) so live windows and recorded
+    histories are processed the same way without looping per package.
+
+    Attributes:
+        a (ndarray): DH link lengths in meters, shape (6,).
+        d (ndarray): DH link offsets in meters, shape (6,).
+        alpha (ndarray): DH link twists in radians, shape (6,).
+        theta_offset (ndarray): DH joint angle offsets in radians, shape (6,).
+        tcp_offset (ndarray): Homogeneous flange-to-TCP transform, shape (4, 4).
+
+    Methods:
+        from_subpackage: Create an engine from a decoded kinematics or configuration subpackage.
+        from_package: Create an engine from the subpackages within a robot state package.
+        forward_kinematics: Compute base-to-TCP transforms for a batch of joint positions.
+        tcp_positions: Compute TCP positions for a batch of joint positions.
+        tcp_speed: Compute TCP linear speed from a series of TCP positions.
+        joint_power: Compute electrical power per joint.
+        cumulative_energy: Integrate power over time per joint.
+        process: Compute every derived metric for a joint history at once.
+    """
+
+    def __init__(self, a, d, alpha, theta_offset=None, tcp_offset=None):
+        self.a = np.asarray(a, dtype=np.float64)
+        self.d = np.asarray(d, dtype=np.float64)
+        self.alpha = np.asarray(alpha, dtype=np.float64)
+        if theta_offset is None:
+            theta_offset = np.zeros(6)
+        self.theta_offset = np.asarray(theta_offset, dtype=np.float64)
+        self.tcp_offset = pose_to_transform(tcp_offset) if tcp_offset is not None else np.eye(4)
+
+        # Link twists never change; therefore, precompute their trigonometry once.
+        self._cos_alpha = np.cos(self.alpha)
+        self._sin_alpha = np.sin(self.alpha)
+
+    @classmethod
+    def from_subpackage(cls, subpackage, tcp_offset=None):
+        """
+        Create an engine from a `KinematicsInfo` or `ConfigurationData` subpackage.
+
+        Args:
+            subpackage (SubPackage): A decoded subpackage carrying DH parameters.
+            tcp_offset (sequence): Optional TCP offset as (x, y, z, rx, ry, rz).
+
+        Returns:
+            KinematicsEngine: An engine using the subpackage's DH parameters.
+
+        Raises:
+            ValueError: If the subpackage does not carry DH parameters.
+        """
+        variables = subpackage.subpackage_variables._asdict()
+
+        # KinematicsInfo and ConfigurationData spell the twist differently.
+        alpha_name = "Dhalpha" if "joint_1_Dhalpha" in variables else "DHalpha"
+        try:
+            a = [variables[f"joint_{i}_DHa"] for i in range(1, 7)]
+            d = [variables[f"joint_{i}_Dhd"] for i in range(1, 7)]
+            alpha = [variables[f"joint_{i}_{alpha_name}"] for i in range(1, 7)]
+            theta = [variables[f"joint_{i}_DHtheta"] for i in range(1, 7)]
+        except KeyError:
+            raise ValueError(f"{subpackage.subpackage_name} does not contain DH parameters.")
+
+        return cls(a, d, alpha, theta, tcp_offset)
+
+    @classmethod
+    def from_package(cls, package):
+        """
+        Create an engine from a robot state package.
+
+        Kinematics Info is preferred because it carries the calibrated parameters; however, the
+        controller only sends them on change, so Configuration Data is used as a fallback. The
+        TCP offset is taken from Cartesian Info when present.
+
+        Args:
+            package (Package): A decoded robot state package.
+
+        Returns:
+            KinematicsEngine: An engine for the robot that sent the package, or None if the
+                              package carries no DH parameters.
+        """
+        tcp_offset = None
+        cartesian_info = package.get_subpackage("Cartesian Info")
+        if cartesian_info is not None:
+            tcp_offset = cartesian_info.subpackage_variables[6:12]
+
+        for name in ("Kinematics Info", "Configuration Data"):
+            subpackage = package.get_subpackage(name)
+            if subpackage is None:
+                continue
+            try:
+                return cls.from_subpackage(subpackage, tcp_offset)
+            except ValueError:
+                continue
+        return None
+
+    def forward_kinematics(self, q):
+        """
+        Compute base-to-TCP homogeneous transforms for a batch of joint positions.
+
+        Args:
+            q (array_like): Joint positions in radians, shape (samples, 6).
+
+        Returns:
+            ndarray: Homogeneous transforms, shape (samples, 4, 4).
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=np.float64))
+        transforms = np.empty((len(q), 4, 4))
+        transforms[:, 3, 0:3] = 0.0
+        transforms[:, 3, 3] = 1.0
+
+        # Blocks keep the working set of the elementwise passes inside the CPU cache.
+        for start in range(0, len(q), FORWARD_KINEMATICS_BLOCK_SIZE):
+            stop = start + FORWARD_KINEMATICS_BLOCK_SIZE
+            self._chain_links(q[start:stop], transforms[start:stop])
+
+        # Most tools are mounted without an offset.
+        if np.array_equal(self.tcp_offset, np.eye(4)):
+            return transforms
+        return np.matmul(transforms, self.tcp_offset)
+
+    def _chain_links(self, q, transforms):
+        """
+        Chain the six DH links for a block of joint positions into `transforms`.
+
+        Args:
+            q (ndarray): Joint positions in radians, shape (samples, 6).
+            transforms (ndarray): Output transforms with the bottom row already set, shape (samples, 4, 4).
+        """
+        theta = (q + self.theta_offset).T
+        cos_theta = np.cos(theta)
+        sin_theta = np.sin(theta)
+
+        # Rotation columns and translation of the running transform, each shaped (3, samples).
+        # Composing column-wise keeps every step an elementwise operation over all samples
+        # instead of a batched matmul of tiny 4x4 matrices.
+        samples = len(q)
+        x_axis = np.zeros((3, samples))
+        y_axis = np.zeros((3, samples))
+        z_axis = np.zeros((3, samples))
+        x_axis[0] = 1.0
+        y_axis[1] = 1.0
+        z_axis[2] = 1.0
+        position = np.zeros((3, samples))
+
+        for joint in range(6):
+            ct = cos_theta[joint]
+            st = sin_theta[joint]
+            ca = self._cos_alpha[joint]
+            sa = self._sin_alpha[joint]
+
+            # Applies Rz(theta) Tz(d) Tx(a) Rx(alpha) to the running transform.
+            position += self.d[joint] * z_axis
+            rotated_x = x_axis * ct + y_axis * st
+            rotated_y = y_axis * ct - x_axis * st
+            position += self.a[joint] * rotated_x
+            x_axis = rotated_x
+            y_axis, z_axis = rotated_y * ca + z_axis * sa, z_axis * ca - rotated_y * sa
+
+        transforms[:, 0:3, 0] = x_axis.T
+        transforms[:, 0:3, 1] = y_axis.T
+        transforms[:, 0:3, 2] = z_axis.T
+        transforms[:, 0:3, 3] = position.T
+
+    def tcp_positions(self, q):
+        """
+        Compute TCP positions for a batch of joint positions.
+
+        Args:
+            q (array_like): Joint positions in radians, shape (samples, 6).
+
+        Returns:
+            ndarray: TCP positions in meters, shape (samples, 3).
+        """
+        return self.forward_kinematics(q)[:, 0:3, 3]
+
+    @staticmethod
+    def tcp_speed(positions, timestamps):
+        """
+        Compute TCP linear speed from a series of TCP positions.
+
+        Args:
+            positions (array_like): TCP positions in meters, shape (samples, 3).
+            timestamps (array_like): Sample times in seconds, shape (samples,).
+
+        Returns:
+            ndarray: TCP speed in meters per second, shape (samples,). The first sample is 0.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        speed = np.zeros(len(timestamps))
+        if len(timestamps) < 2:
+            return speed
+
+        distance = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+        elapsed = np.diff(timestamps)
+
+        # Repeated timestamps carry no motion information.
+        np.divide(distance, elapsed, out=speed[1:], where=elapsed > 0)
+        return speed
+
+    @staticmethod
+    def joint_power(current, voltage):
+        """
+        Compute electrical power per joint.
+
+        Args:
+            current (array_like): Joint currents in amperes, shape (samples, 6).
+            voltage (array_like): Joint voltages in volts, shape (samples, 6).
+
+        Returns:
+            ndarray: Joint power in watts, shape (samples, 6).
+        """
+        return np.multiply(current, voltage, dtype=np.float64)
+
+    @staticmethod
+    def cumulative_energy(power, timestamps):
+        """
+        Integrate power over time per joint using the trapezoidal rule.
+
+        Args:
+            power (array_like): Joint power in watts, shape (samples, 6).
+            timestamps (array_like): Sample times in seconds, shape (samples,).
+
+        Returns:
+            ndarray: Energy in joules accumulated since the first sample, shape (samples, 6).
+        """
+        power = np.asarray(power, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        energy = np.zeros_like(power)
+        if len(timestamps) < 2:
+            return energy
+
+        elapsed = np.diff(timestamps)[:, np.newaxis]
+        np.cumsum(0.5 * (power[1:] + power[:-1]) * elapsed, axis=0, out=energy[1:])
+        return energy
+
+    def process(self, timestamps, q, current, voltage):
+        """
+        Compute every derived metric for a joint history in a single vectorized pass.
+
+        Args:
+            timestamps (array_like): Sample times in seconds, shape (samples,).
+            q (array_like): Joint positions in radians, shape (samples, 6).
+            current (array_like): Joint currents in amperes, shape (samples, 6).
+            voltage (array_like): Joint voltages in volts, shape (samples, 6).
+
+        Returns:
+            KinematicsResult: Transforms, TCP speed, joint power and cumulative energy.
+        """
+        transforms = self.forward_kinematics(q)
+        speed = self.tcp_speed(transforms[:, 0:3, 3], timestamps)
+        power = self.joint_power(current, voltage)
+        energy = self.cumulative_energy(power, timestamps)
+        return KinematicsResult(transforms, speed, power, energy)
+
+
+def pose_to_transform(pose):
+    """
+    Convert a UR pose (x, y, z, rx, ry, rz) with a rotation vector into a homogeneous transform.
+
+    Args:
+        pose (sequence): Translation in meters followed by a rotation vector in radians.
+
+    Returns:
+        ndarray: Homogeneous transform, shape (4, 4).
+    """
+    pose = np.asarray(pose, dtype=np.float64)
+    transform = np.eye(4)
+    transform[0:3, 3] = pose[0:3]
+
+    # Rodrigues' formula; a zero rotation vector leaves the identity in place.
+    angle = np.linalg.norm(pose[3:6])
+    if angle > 0:
+        kx, ky, kz = pose[3:6] / angle
+        k = np.array([[0, -kz, ky], [kz, 0, -kx], [-ky, kx, 0]])
+        transform[0:3, 0:3] = np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * (k @ k)
+
+    return transform
+
+
+def joint_history(packages):
+    """
+    Collect joint states from a sequence of robot state packages into arrays.
+
+    Packages without Robot Mode Data or Joint Data are skipped.
+
+    Args:
+        packages (iterable): Decoded robot state packages.
+
+    Returns:
+        tuple: Controller timestamps in seconds, shape (samples,), followed by q_actual,
+               I_actual and V_actual, each shaped (samples, 6).
+    """
+    timestamps, q, current, voltage = [], [], [], []
+    for package in packages:
+        robot_mode_data = package.get_subpackage("Robot Mode Data")
+        joint_data = package.get_subpackage("Joint Data")
+        if robot_mode_data is None or joint_data is None:
+            continue
+
+        variables = joint_data.subpackage_variables
+        timestamps.append(robot_mode_data.subpackage_variables.timestamp.total_seconds())
+        q.append(variables[0::8])
+        current.append(variables[3::8])
+        voltage.append(variables[4::8])
+
+    return (
+        np.array(timestamps, dtype=np.float64),
+        np.array(q, dtype=np.float64).reshape(-1, 6),
+        np.array(current, dtype=np.float64).reshape(-1, 6),
+        np.array(voltage, dtype=np.float64).reshape(-1, 6)
+    )
+
+
+########################### NAMED TUPLES ###########################
+KinematicsResult = namedtuple("KinematicsResult", [
+    "transforms",
+    "tcp_speed",
+    "joint_power",
+    "energy"
+])
@@ -0,0 +1,227 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+from bisect import bisect_right
+from collections import namedtuple
+from tabulate import tabulate
+
+# Histogram bin edges in milliseconds; values beyond the last edge fall into an overflow bin.
+LATENCY_BIN_EDGES_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+INTER_ARRIVAL_BIN_EDGES_MS = [10, 50, 80, 90, 95, 100, 105, 110, 120, 150, 200, 500, 1000]
+
+class LatencyEstimator:
+    """
+    Estimates latency, jitter and gaps by pairing controller and host clocks.
+
+    Every update pairs the controller timestamp from Robot Mode Data with the host's
+    monotonic receive time. The difference between the two clocks is the clock offset,
+    which grows linearly with the clocks' relative drift and fluctuates with network and
+    client-side delay. The drift is fitted with a running least-squares line; the latency
+    is the drift-corrected offset above the fastest delivery observed so far.
+
+    Jitter follows RFC 3550: a running mean of the differences between host and controller
+    inter-arrival times. Gaps are controller timestamp steps longer than 1.5 times the
+    expected period, which is learned as the shortest step seen unless given.
+
+    One estimator should be kept per robot connection.
+
+    Attributes:
+        expected_period (float): The controller's publishing period in seconds, or None
+                                 until learned.
+        samples (int): The number of paired timestamps processed.
+        offset (float): The latest host-minus-controller clock offset in seconds.
+        latency (float): The latest latency estimate in seconds.
+        jitter (float): The RFC 3550 inter-arrival jitter in seconds.
+        gaps (int): The number of gaps detected.
+        dropped (int): The number of messages inferred as missing from the gaps.
+        latency_histogram (list): Counts per bin of LATENCY_BIN_EDGES_MS.
+        inter_arrival_histogram (list): Counts per bin of INTER_ARRIVAL_BIN_EDGES_MS.
+
+    Methods:
+        update: Process a pair of controller and host timestamps.
+        update_from_package: Process the timestamps carried by a package.
+        drift: Report the fitted clock drift in parts per million.
+        stats: Retrieve the current estimates as a named tuple.
+        report: Generate tables of the current estimates and histograms.
+    """
+
+    def __init__(self, expected_period=None):
+        self.expected_period = expected_period
+        self.learn_period = expected_period is None
+        self.samples = 0
+        self.offset = None
+        self.latency = None
+        self.max_latency = 0.0
+        self.jitter = 0.0
+        self.gaps = 0
+        self.dropped = 0
+        self.latency_histogram = [0] * (len(LATENCY_BIN_EDGES_MS) + 1)
+        self.inter_arrival_histogram = [0] * (len(INTER_ARRIVAL_BIN_EDGES_MS) + 1)
+
+        self._first = None
+        self._previous = None
+        self._min_corrected_offset = None
+        self._sums = [0.0] * 5  # n, sum t, sum o, sum t*t, sum t*o
+
+    def update(self, controller_timestamp, host_timestamp):
+        """
+        Process a pair of controller and host timestamps.
+
+        Args:
+            controller_timestamp (float): The controller timestamp in seconds.
+            host_timestamp (float): The host monotonic receive time in seconds.
+        """
+        if self._first is None:
+            self._first = (controller_timestamp, host_timestamp)
+
+        # Both clocks are measured from the first sample to keep the fit well conditioned.
+        controller_elapsed = controller_timestamp - self._first[0]
+        offset = host_timestamp - controller_timestamp
+        relative_offset = offset - (self._first[1] - self._first[0])
+
+        sums = self._sums
+        sums[0] += 1
+        sums[1] += controller_elapsed
+        sums[2] += relative_offset
+        sums[3] += controller_elapsed * controller_elapsed
+        sums[4] += controller_elapsed * relative_offset
+
+        corrected_offset = relative_offset - self._slope() * controller_elapsed
+        if self._min_corrected_offset is None or corrected_offset < self._min_corrected_offset:
+            self._min_corrected_offset = corrected_offset
+        self.latency = corrected_offset - self._min_corrected_offset
+        self.max_latency = max(self.max_latency, self.latency)
+        self.latency_histogram[bisect_right(LATENCY_BIN_EDGES_MS, self.latency * 1000)] += 1
+
+        if self._previous is not None:
+            controller_step = controller_timestamp - self._previous[0]
+            host_step = host_timestamp - self._previous[1]
+            self.jitter += (abs(host_step - controller_step) - self.jitter) / 16
+            self.inter_arrival_histogram[bisect_right(INTER_ARRIVAL_BIN_EDGES_MS, host_step * 1000)] += 1
+
+            if self.learn_period and controller_step > 0:
+                if self.expected_period is None or controller_step < self.expected_period:
+                    self.expected_period = controller_step
+
+            if self.expected_period and controller_step > 1.5 * self.expected_period:
+                self.gaps += 1
+                self.dropped += max(round(controller_step / self.expected_period) - 1, 1)
+
+        self._previous = (controller_timestamp, host_timestamp)
+        self.offset = offset
+        self.samples += 1
+
+    def update_from_package(self, package) -> bool:
+        """
+        Process the timestamps carried by a package.
+
+        Args:
+            package (Package): A decoded package.
+
+        Returns:
+            bool: True if the package carried Robot Mode Data and was processed.
+        """
+        robot_mode_data = package.get_subpackage("Robot Mode Data")
+        if robot_mode_data is None:
+            return False
+
+        controller_timestamp = robot_mode_data.subpackage_variables.timestamp.total_seconds()
+        self.update(controller_timestamp, package.received_monotonic)
+        return True
+
+    def _slope(self):
+        n, sum_t, sum_o, sum_tt, sum_to = self._sums
+        denominator = n * sum_tt - sum_t * sum_t
+        if n < 2 or denominator <= 0:
+            return 0.0
+        return (n * sum_to - sum_t * sum_o) / denominator
+
+    def drift(self) -> float:
+        """
+        Report the fitted clock drift of the host relative to the controller.
+
+        Returns:
+            float: The drift in parts per million.
+        """
+        return self._slope() * 1e6
+
+    def stats(self):
+        """
+        Retrieve the current estimates.
+
+        Returns:
+            LatencyStats: The current estimates with times in seconds.
+        """
+        return LatencyStats(
+            self.samples, self.offset, self.drift(), self.latency, self.max_latency,
+            self.jitter, self.expected_period, self.gaps, self.dropped
+        )
+
+    def report(self) -> str:
+        """
+        Generate tables of the current estimates and histograms.
+
+        Returns:
+            str: The formatted estimates followed by the latency and inter-arrival histograms.
+        """
+        stats = self.stats()
+        table = tabulate(list(zip(stats._fields, stats)), headers=["Statistic", "Value"], tablefmt="grid")
+
+        latency_labels = self._bin_labels(LATENCY_BIN_EDGES_MS)
+        latency_table = tabulate(
+            list(zip(latency_labels, self.latency_histogram)), headers=["Latency (ms)", "Count"], tablefmt="grid")
+
+        inter_arrival_labels = self._bin_labels(INTER_ARRIVAL_BIN_EDGES_MS)
+        inter_arrival_table = tabulate(
+            list(zip(inter_arrival_labels, self.inter_arrival_histogram)), headers=["Inter-arrival (ms)", "Count"], tablefmt="grid")
+
+        return f"{table}\n\n{latency_table}\n\n{inter_arrival_table}\n"
+
+    @staticmethod
+    def _bin_labels(edges):
+        labels = [f"< {edges[0]}"]
+        labels += [f"{low} - {high}" for low, high in zip(edges, edges[1:])]
+        labels.append(f">= {edges[-1]}")
+        return labels
+
+
+########################### NAMED TUPLES ###########################
+LatencyStats = namedtuple("LatencyStats", [
+    "samples",
+    "offset",
+    "drift_ppm",
+    "latency",
+    "max_latency",
+    "jitter",
+    "expected_period",
+    "gaps",
+    "dropped"
+])
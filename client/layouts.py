@@ -0,0 +1,253 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import struct
+from collections import namedtuple
+from datetime import timedelta
+from subpackage import *
+
+# Describes one subpackage variant. Variables listed in constants are not sent by the controller
+# and take the given values; converters map variable names to functions applied after unpacking.
+SubPackageLayout = namedtuple("SubPackageLayout", [
+    "subpackage_type",
+    "subpackage_class",
+    "subpackage_name",
+    "format_string",
+    "field_names",
+    "constants",
+    "converters"
+])
+
+def microseconds_to_timedelta(value):
+    return timedelta(seconds=value/1000000)
+
+
+def joint_fields(structure):
+    return [f'Joint{i+1}_{field}' for i in range(6) for field in structure._fields]
+
+
+EUROMAP_FIELDS = MasterboardDataStructure._fields[17:21]
+
+# Robot state subpackage layouts of the e-Series controller (PolyScope 5). Every entry describes
+# one subpackage variant of a fixed length; subpackages whose content depends on the robot,
+# like Master Board Data with or without a Euromap67 interface, have one entry per variant.
+E_SERIES_LAYOUTS = [
+    SubPackageLayout(0, RobotModeData, "Robot Mode Data", '>Q????????BdddB', RobotModeDataStructure._fields,
+                     {}, {"timestamp": microseconds_to_timedelta}),
+    SubPackageLayout(1, JointData, "Joint Data", '>' + 'dddffffB' * 6, joint_fields(JointDataStructure), {}, {}),
+    SubPackageLayout(2, ToolData, "Tool Data", '>BBddfBffB', ToolDataStructure._fields, {}, {}),
+    SubPackageLayout(3, MasterBoardData, "Master Board Data", '>IIBBddBBddffffBBBIBBB', MasterboardDataStructure._fields,
+                     {field: "Not used" for field in EUROMAP_FIELDS}, {}),
+    SubPackageLayout(3, MasterBoardData, "Master Board Data", '>IIBBddBBddffffBBBIIffIBBB', MasterboardDataStructure._fields,
+                     {}, {}),
+    SubPackageLayout(4, CartesianInfo, "Cartesian Info", '>dddddddddddd', CartesianInfoStructure._fields, {}, {}),
+    SubPackageLayout(5, KinematicsInfo, "Kinematics Info", '>i', ["calibration_status"], {}, {}),
+    SubPackageLayout(5, KinematicsInfo, "Kinematics Info", '>iiiiiiddddddddddddddddddddddddi',
+                     KinematicsInfo.create_flattened_fields(None), {}, {}),
+    SubPackageLayout(6, ConfigurationData, "Configuration Data", '>' + 'd' * 53 + 'iiii',
+                     ConfigurationData.create_flattened_fields(None), {}, {}),
+    SubPackageLayout(7, ForceModeData, "Force Mode Data", '>ddddddd', ForceModeDataStructure._fields, {}, {}),
+    SubPackageLayout(8, AdditionalInfo, "Additional Info", '>B??B', AdditionalInfoStructure._fields, {}, {}),
+    SubPackageLayout(9, CalibrationData, "Calibration Data", '>dddddd', CalibrationDataStructure._fields, {}, {}),
+    SubPackageLayout(11, ToolCommunicationInfo, "Tool Communication Info", '>?IIIff',
+                     ToolCommunicationInfoStructure._fields, {}, {}),
+    SubPackageLayout(12, ToolModeInfo, "Tool Mode Info", '>BBB', ToolModeInfoStructure._fields, {}, {}),
+    SubPackageLayout(13, SingularityInfo, "Singularity Info", '>BB', SingularityInfoStructure._fields, {}, {})
+]
+
+# Layout tables keyed by the first (major, minor) controller version they apply to. Supporting
+# new firmware means adding a table here, not new SubPackage classes.
+LAYOUT_TABLES = {
+    (5, 0): E_SERIES_LAYOUTS
+}
+
+def layout_length(layout) -> int:
+    """
+    Return the length of a subpackage with the given layout, including its 5 byte header.
+    """
+    return struct.calcsize(layout.format_string) + 5
+
+
+def layout_codes(layout):
+    """
+    Return (variable name, struct code) pairs for the variables sent in a subpackage, in order.
+
+    Variables listed as constants are not sent and are left out.
+    """
+    sent_fields = [field for field in layout.field_names if field not in layout.constants]
+    return list(zip(sent_fields, layout.format_string.lstrip('>')))
+
+
+def generate_decoder(layout):
+    """
+    Generate a decode function specialized for one subpackage layout.
+
+    The function unpacks the subpackage with one precompiled Struct and creates the subpackage
+    object directly from the unpacked values, skipping the class factory and the per-class
+    decoding, e.g. the Euromap67 branch of Master Board Data.
+
+    Args:
+        layout (SubPackageLayout): The subpackage layout.
+
+    Returns:
+        function: A function taking the arguments of `SubPackage.create_subpackage`.
+    """
+    unpack_from = struct.Struct(layout.format_string).unpack_from
+    make = namedtuple(f"{layout.subpackage_class.__name__}Layout", layout.field_names)._make
+    from_variables = layout.subpackage_class.from_variables
+    subpackage_name = layout.subpackage_name
+
+    if not layout.constants and not layout.converters:
+        def decode(package_type, subpackage_data, subpackage_length, subpackage_type):
+            variables = make(unpack_from(subpackage_data, 5))
+            return from_variables(package_type, subpackage_data, subpackage_length, subpackage_type, subpackage_name, variables)
+        return decode
+
+    # Each variable is either taken from the unpacked values, possibly converted, or is a constant.
+    sources = []
+    index = 0
+    for field in layout.field_names:
+        if field in layout.constants:
+            sources.append((None, None, layout.constants[field]))
+        else:
+            sources.append((index, layout.converters.get(field), None))
+            index += 1
+
+    def decode(package_type, subpackage_data, subpackage_length, subpackage_type):
+        values = unpack_from(subpackage_data, 5)
+        variables = make([
+            constant if position is None else (convert(values[position]) if convert else values[position])
+            for position, convert, constant in sources
+        ])
+        return from_variables(package_type, subpackage_data, subpackage_length, subpackage_type, subpackage_name, variables)
+    return decode
+
+
+def generate_decoders(layouts) -> dict:
+    """
+    Generate the decode functions of a layout table keyed by (subpackage type, subpackage length).
+    """
+    return {(layout.subpackage_type, layout_length(layout)): generate_decoder(layout) for layout in layouts}
+
+
+def layout_version(major, minor):
+    """
+    Return the version key of the layout table that applies to a controller version.
+
+    The newest table not newer than the controller is used; older controllers use the oldest table.
+    """
+    versions = sorted(LAYOUT_TABLES)
+    applicable = [version for version in versions if version <= (major, minor)]
+    return applicable[-1] if applicable else versions[0]
+
+
+# Decode functions are generated once, at import time.
+LAYOUT_DECODERS = {version: generate_decoders(layouts) for version, layouts in LAYOUT_TABLES.items()}
+
+def register_layout_table(version, layouts):
+    """
+    Add a layout table at runtime and generate its decode functions.
+
+    Args:
+        version (tuple): The first (major, minor) controller version the table applies to.
+        layouts (list): SubPackageLayout entries, in the form of `E_SERIES_LAYOUTS`.
+    """
+    LAYOUT_TABLES[version] = list(layouts)
+    LAYOUT_DECODERS[version] = generate_decoders(layouts)
+
+
+class LayoutDecoder:
+    """
+    Decodes robot state subpackages with the decode functions generated for one controller version.
+
+    Subpackages are dispatched on their type and length, so variants such as Master Board Data
+    with a Euromap67 interface are chosen by a dictionary lookup instead of per-package branching.
+    A subpackage of a known type with an unknown length becomes an UnknownSubPackage rather than
+    being decoded with the wrong layout. Subpackages without a layout, including robot messages,
+    are created by `SubPackage.create_subpackage`.
+
+    One decoder is meant to be used per connection. It starts with the newest table and switches
+    to the table matching the version message the controller sends on connect.
+
+    Attributes:
+        version (tuple): The (major, minor) key of the layout table in use.
+        controller_version (tuple): The (major, minor, bugfix, build) version reported by the
+                                    controller, or None until a version message is seen.
+        decoders (dict): The decode functions keyed by (subpackage type, subpackage length).
+
+    Methods:
+        select_version: Use the layout table matching a controller version.
+        update: Select the layout table from a version message package.
+        create_subpackage: Decode a subpackage; a drop-in for `SubPackage.create_subpackage`.
+    """
+
+    def __init__(self, version=None):
+        self.controller_version = None
+        self.select_version(*(version or max(LAYOUT_TABLES)))
+
+    def select_version(self, major, minor):
+        self.version = layout_version(major, minor)
+        self.decoders = LAYOUT_DECODERS[self.version]
+        self.subpackage_types = {subpackage_type for subpackage_type, _ in self.decoders}
+
+    def update(self, package) -> bool:
+        """
+        Select the layout table from a version message package.
+
+        Args:
+            package (Package): Any decoded package; only version messages are used.
+
+        Returns:
+            bool: True if the package was a version message.
+        """
+        if package.type != 20 or not package.subpackage_list:
+            return False
+        message = package.subpackage_list[0]
+        if not isinstance(message, VersionMessage):
+            return False
+
+        variables = message.subpackage_variables
+        self.controller_version = (variables.majorVersion, variables.minorVersion, variables.bugfixVersion, variables.buildNumber)
+        self.select_version(variables.majorVersion, variables.minorVersion)
+        return True
+
+    def create_subpackage(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        if package_type == 16:
+            decode = self.decoders.get((subpackage_type, subpackage_length))
+            if decode is not None:
+                return decode(package_type, subpackage_data, subpackage_length, subpackage_type)
+            if subpackage_type in self.subpackage_types:
+                return UnknownSubPackage(package_type, subpackage_data, subpackage_length, subpackage_type)
+        return SubPackage.create_subpackage(package_type, subpackage_data, subpackage_length, subpackage_type)
+
+    def __str__(self):
+        controller = ".".join(str(part) for part in self.controller_version) if self.controller_version else "unknown"
+        return f"LAYOUT DECODER: controller version {controller}, layout table {self.version[0]}.{self.version[1]}, {len(self.decoders)} subpackage layouts"
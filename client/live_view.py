@@ -0,0 +1,258 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import json
+import queue
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+LIVE_VIEW_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>UR Live View</title></head>
+<body>
+<table id="values" border="1"><tr><th>Variable</th><th>Value</th></tr></table>
+<script>
+const table = document.getElementById("values");
+const rows = {};
+const source = new EventSource("/events" + window.location.search);
+source.onmessage = (event) => {
+    for (const [name, value] of Object.entries(JSON.parse(event.data))) {
+        if (!(name in rows)) {
+            const row = table.insertRow();
+            row.insertCell().textContent = name;
+            rows[name] = row.insertCell();
+        }
+        rows[name].textContent = value;
+    }
+};
+</script>
+</body>
+</html>
+"""
+
+class LiveViewClient:
+    """
+    A browser subscribed to the live view.
+
+    Updates are handed over through a bounded queue. When a slow browser lets its queue
+    fill up, pending updates are discarded and the browser is sent a full snapshot once it
+    catches up, so the publishing side never waits.
+
+    Attributes:
+        fields (list): Flattened or bare variable names to send, or None for every variable.
+        updates (Queue): Pending updates for the browser.
+        needs_snapshot (bool): Whether updates were discarded since the last snapshot.
+    """
+
+    def __init__(self, fields, queue_size):
+        self.fields = fields
+        self.updates = queue.Queue(maxsize=queue_size)
+        self.needs_snapshot = False
+        self.matches = {}
+
+    def subscribed(self, name) -> bool:
+        if self.fields is None:
+            return True
+        if name not in self.matches:
+            self.matches[name] = any(name == field or name.endswith(f"_{field}") for field in self.fields)
+        return self.matches[name]
+
+    def select(self, values) -> dict:
+        return {name: value for name, value in values.items() if self.subscribed(name)}
+
+    def offer(self, delta):
+        delta = self.select(delta)
+        if not delta:
+            return
+        try:
+            self.updates.put_nowait(delta)
+        except queue.Full:
+            self.needs_snapshot = True
+
+
+class LiveViewServer:
+    """
+    A local web server pushing changed variables to browsers with Server-Sent Events.
+
+    `publish` is called from the receiving loop with every decoded package. It only records
+    values that changed since the previous package, which takes a lock briefly and never
+    performs I/O. A broadcaster thread coalesces the changes and hands one update per refresh
+    period to every browser, so one decode serves any number of viewers.
+
+    Browsers open `/` for a table of values, or subscribe to `/events` directly. Both accept
+    `?fields=X,Y,Joint1_q_actual` to limit the variables sent.
+
+    Attributes:
+        address (tuple): The (host, port) the server listens on once started.
+        refresh_rate (float): The maximum number of updates per second sent to each browser.
+        client_queue_size (int): The number of updates buffered per browser.
+        values (dict): The latest value of every variable published.
+
+    Methods:
+        start: Start serving and broadcasting in background threads.
+        stop: Stop serving and disconnect every browser.
+        publish: Record the variables of a package that changed.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8000, refresh_rate=5.0, client_queue_size=16):
+        self.address = (host, port)
+        self.refresh_rate = refresh_rate
+        self.client_queue_size = client_queue_size
+        self.values = {}
+        self.pending = {}
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.server = None
+        self.threads = []
+
+    def publish(self, package):
+        """
+        Record the variables of a package that changed since the previous package.
+
+        Args:
+            package (Package): A decoded package; packages without subpackages are ignored.
+        """
+        if not package.subpackage_list:
+            return
+
+        changed = {}
+        values = self.values
+        for name, value in package.get_flattened_variables().items():
+            if isinstance(value, timedelta):
+                value = value.total_seconds()
+            if values.get(name, changed) != value:
+                changed[name] = value
+
+        if changed:
+            with self.lock:
+                values.update(changed)
+                self.pending.update(changed)
+
+    def broadcast(self):
+        while not self.stopped.wait(1.0 / self.refresh_rate):
+            with self.lock:
+                delta, self.pending = self.pending, {}
+                clients = list(self.clients)
+            if delta:
+                for client in clients:
+                    client.offer(delta)
+
+    def snapshot(self, client) -> dict:
+        with self.lock:
+            return client.select(self.values)
+
+    def start(self):
+        live_view = self
+
+        class LiveViewHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                return
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/":
+                    self.send_page()
+                elif url.path == "/events":
+                    fields = parse_qs(url.query).get("fields")
+                    fields = fields[0].split(",") if fields else None
+                    self.send_events(LiveViewClient(fields, live_view.client_queue_size))
+                else:
+                    self.send_error(404)
+
+            def send_page(self):
+                page = LIVE_VIEW_PAGE.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def send_event(self, values):
+                self.wfile.write(f"data: {json.dumps(values, default=str)}\n\n".encode())
+                self.wfile.flush()
+
+            def send_events(self, client):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                with live_view.lock:
+                    live_view.clients.add(client)
+                try:
+                    self.send_event(live_view.snapshot(client))
+                    while not live_view.stopped.is_set():
+                        if client.needs_snapshot:
+                            client.needs_snapshot = False
+                            with client.updates.mutex:
+                                client.updates.queue.clear()
+                            self.send_event(live_view.snapshot(client))
+                        try:
+                            delta = client.updates.get(timeout=1.0)
+                        except queue.Empty:
+                            # Comments keep idle connections alive and detect closed browsers.
+                            self.wfile.write(b": keep-alive\n\n")
+                            self.wfile.flush()
+                            continue
+                        self.send_event(delta)
+                except OSError:
+                    pass
+                finally:
+                    with live_view.lock:
+                        live_view.clients.discard(client)
+
+        self.stopped.clear()
+        self.server = ThreadingHTTPServer(self.address, LiveViewHandler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self.threads = [
+            threading.Thread(target=self.server.serve_forever, daemon=True),
+            threading.Thread(target=self.broadcast, daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
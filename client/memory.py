@@ -0,0 +1,172 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import sys
+from collections import namedtuple, deque
+from tabulate import tabulate
+
+# Objects shared by every reference, whose size is not held by any one buffer.
+SHARED_TYPES = (bool, type(None), type)
+
+def deep_sizeof(obj, seen=None) -> int:
+    """
+    Estimate the bytes held by an object and everything it references.
+
+    Containers, named tuples and objects with a `__dict__` are followed; each object is
+    counted once. Memoryviews count only themselves, not the buffer they view, and shared
+    objects such as booleans, None, classes and small integers are not counted.
+
+    Args:
+        obj: The object to measure.
+        seen (set): The ids of objects already counted.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if seen is None:
+        seen = set()
+    if isinstance(obj, SHARED_TYPES) or (type(obj) is int and -5 <= obj <= 256) or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, memoryview)):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (tuple, list, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        # Instance attribute names are shared between instances; count a reference per value.
+        attributes = vars(obj)
+        size += sum(deep_sizeof(value, seen) for value in attributes.values()) + 8 * len(attributes)
+    return size
+
+
+def package_nbytes(package) -> int:
+    """
+    Estimate the bytes held by a decoded package, including its robot data and subpackages.
+
+    Subpackages shared through a DecodeCache are counted as if the package owned them.
+    """
+    return deep_sizeof(package)
+
+
+def frame_usage(buffer, frames, robot=None) -> list:
+    """
+    Report the memory held by a collection of raw messages, per package type.
+
+    Args:
+        buffer (str): The buffer name reported.
+        frames (iterable): Raw messages.
+        robot (str): The robot reported.
+
+    Returns:
+        list: MemoryUsage tuples, one per package type present.
+    """
+    usage = {}
+    for frame in frames:
+        items, nbytes = usage.get(frame[4], (0, 0))
+        usage[frame[4]] = (items + 1, nbytes + sys.getsizeof(frame))
+    return [MemoryUsage(robot, buffer, package_type, items, nbytes) for package_type, (items, nbytes) in sorted(usage.items())]
+
+
+class MemoryAccountant:
+    """
+    Reports the bytes held by buffers across robots.
+
+    Any object with a `memory_usage()` method returning MemoryUsage tuples can be registered,
+    e.g. PackageWriter, RingHistory, TriggerEngine and DecodeCache. Usage is collected on
+    request, so registering a buffer costs nothing per package.
+
+    Attributes:
+        buffers (list): The registered (robot, buffer) pairs.
+
+    Methods:
+        register: Add a buffer to the report.
+        usage: Collect the current MemoryUsage of every registered buffer.
+        totals: Sum the bytes held per robot, buffer or package type.
+        total: Sum the bytes held by every registered buffer.
+    """
+
+    GROUPS = ("robot", "buffer", "package_type")
+
+    def __init__(self):
+        self.buffers = []
+
+    def register(self, buffer, robot="robot"):
+        self.buffers.append((robot, buffer))
+        return buffer
+
+    def usage(self) -> list:
+        usage = []
+        for robot, buffer in self.buffers:
+            usage.extend(entry._replace(robot=robot) for entry in buffer.memory_usage())
+        return usage
+
+    def totals(self, group="robot") -> dict:
+        """
+        Sum the bytes held per robot, buffer or package type.
+
+        Args:
+            group (str): One of "robot", "buffer" or "package_type".
+
+        Returns:
+            dict: The bytes held keyed by the group's values.
+        """
+        if group not in self.GROUPS:
+            raise ValueError(f"Unknown group {group}; expected one of {', '.join(self.GROUPS)}")
+        totals = {}
+        for entry in self.usage():
+            key = getattr(entry, group)
+            totals[key] = totals.get(key, 0) + entry.nbytes
+        return totals
+
+    def total(self) -> int:
+        return sum(entry.nbytes for entry in self.usage())
+
+    def __str__(self):
+        usage = self.usage()
+        rows = [(entry.robot, entry.buffer, "-" if entry.package_type is None else entry.package_type, entry.items, entry.nbytes)
+                for entry in usage]
+        table = tabulate(rows, headers=["Robot", "Buffer", "Package Type", "Items", "Bytes"], tablefmt="grid")
+        total = sum(entry.nbytes for entry in usage)
+        return f"MEMORY: {total} bytes held by {len(self.buffers)} buffers\n{table}\n"
+
+
+########################### NAMED TUPLES ###########################
+MemoryUsage = namedtuple("MemoryUsage", [
+    "robot",
+    "buffer",
+    "package_type",
+    "items",
+    "nbytes"
+])
@@ -0,0 +1,161 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import csv
+import heapq
+import math
+from collections import namedtuple
+from pipeline import file_source, frame, decode, project
+
+def capture_samples(file_path, robot, fields=None, clock_offset=0.0):
+    """
+    Read a capture file as a stream of timed samples.
+
+    Controller clocks start when each controller boots, so recordings from different robots
+    only line up once shifted onto a common clock. `clock_offset` is added to every
+    controller timestamp for that purpose, e.g. the host-minus-controller offset reported by
+    a LatencyEstimator while recording.
+
+    Args:
+        file_path (str): The capture file path.
+        robot (str): The name attached to every sample.
+        fields (list): Variables to keep, or None for every variable.
+        clock_offset (float): Seconds added to the controller timestamps.
+
+    Yields:
+        TimedSample: One sample per robot state message, in file order.
+    """
+    packages = decode(frame(file_source(file_path)))
+    if fields is not None:
+        for row in project(packages, ["Robot_Mode_Data_timestamp"] + list(fields)):
+            timestamp = row.pop("Robot_Mode_Data_timestamp")
+            if timestamp is None:
+                continue
+            row.pop("received_timestamp")
+            yield TimedSample(timestamp.total_seconds() + clock_offset, robot, row)
+        return
+
+    for package in packages:
+        if package.type != 16:
+            continue
+        values = package.get_flattened_variables()
+        timestamp = values.get("Robot_Mode_Data_timestamp")
+        if timestamp is None:
+            continue
+        yield TimedSample(timestamp.total_seconds() + clock_offset, robot, values)
+
+
+def csv_samples(file_path, robot, time_field="controller_timestamp", clock_offset=0.0):
+    """
+    Read a CSV file, such as one written by bulk_decode.py, as a stream of timed samples.
+
+    Args:
+        file_path (str): The CSV file path; rows must be in time order.
+        robot (str): The name attached to every sample.
+        time_field (str): The column holding timestamps in seconds.
+        clock_offset (float): Seconds added to the timestamps.
+
+    Yields:
+        TimedSample: One sample per row; values are kept as strings.
+    """
+    with open(file_path, newline="") as file:
+        for row in csv.DictReader(file):
+            timestamp = float(row.pop(time_field)) + clock_offset
+            yield TimedSample(timestamp, robot, row)
+
+
+def merge_streams(*streams):
+    """
+    Merge time-ordered sample streams into one time-ordered stream.
+
+    A heap holds one pending sample per stream, so memory does not grow with the length of
+    the recordings. Samples with equal timestamps keep the order of their streams.
+
+    Args:
+        streams: Iterables of TimedSample, each in time order.
+
+    Yields:
+        TimedSample: Every sample of every stream, in time order.
+    """
+    yield from heapq.merge(*streams, key=lambda sample: sample.timestamp)
+
+
+def align_asof(samples, period, start=None, tolerance=None):
+    """
+    Attach each robot's latest sample to a common tick.
+
+    Ticks are computed as `start + n * period`, so they do not accumulate rounding error, and
+    ticks before the first sample are skipped rather than visited one by one.
+
+    Args:
+        samples (iterable): A time-ordered stream of TimedSample, e.g. from `merge_streams`.
+        period (float): The seconds between ticks.
+        start (float): The first tick, or None to start at the first sample.
+        tolerance (float): The maximum age of a sample at a tick, or None for no limit.
+                           Older samples are left out of the tick.
+
+    Yields:
+        tuple: (tick, dict of robot name to TimedSample) for every tick up to the last sample.
+    """
+    latest = {}
+    tick_index = None
+    for sample in samples:
+        if tick_index is None:
+            if start is None:
+                start = sample.timestamp
+            # Ticks before the first sample have no samples; start at the first tick at or after it.
+            tick_index = max(0, math.ceil((sample.timestamp - start) / period - 1e-9))
+
+        # A tick is complete once a sample beyond it arrives.
+        while sample.timestamp > start + tick_index * period:
+            if latest:
+                tick = start + tick_index * period
+                yield tick, current_samples(latest, tick, tolerance)
+            tick_index += 1
+        latest[sample.robot] = sample
+
+    if latest:
+        tick = start + tick_index * period
+        yield tick, current_samples(latest, tick, tolerance)
+
+
+def current_samples(latest, tick, tolerance):
+    if tolerance is None:
+        return dict(latest)
+    return {robot: sample for robot, sample in latest.items() if tick - sample.timestamp <= tolerance}
+
+
+########################### NAMED TUPLES ###########################
+TimedSample = namedtuple("TimedSample", [
+    "timestamp",
+    "robot",
+    "values"
+])
@@ -30,6 +30,7 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 '''
 
 import struct
+import time
 from subpackage import *
 from datetime import datetime
 
@@ -49,25 +50,38 @@ class Package:
                           robot parameters encoded as packages and subpackages.
         subpackage_list (list): A list containing the processed subpackage objects.
         received_timestamp (datetime): A timestamp representing when the package was received.
+        received_monotonic (float): A host monotonic clock reading, in seconds, taken when the
+                                    message was received, or before parsing if not given.
+        decode_cache (DecodeCache): An optional cache used to reuse unchanged subpackages.
+        layout (LayoutDecoder): An optional decoder that creates robot state subpackages from
+                                the layout table of the connected controller's version.
 
     Methods:
         get_package_length: Extract the package length from the given robot data.
         get_package_type: Extract the package type from the given robot data.
         read_subpackages: Deserialize and process subpackages within the robot data.
+        read_message: Deserialize a robot message or program state message.
         get_subpackage: Retrieve a specific subpackage from the subpackage list by name.
+        get_flattened_variables: Retrieve every subpackage variable keyed by its flattened name.
         __str__: Generate a report for the package object, including its subpackages.
     """
 
-    def __init__(self, robot_data):
+    def __init__(self, robot_data, decode_cache=None, layout=None, received_monotonic=None):
+        self.received_monotonic = time.monotonic() if received_monotonic is None else received_monotonic
         self.length = self.get_package_length(robot_data)
         self.type = self.get_package_type(robot_data)
         self.robot_data = robot_data
         self.subpackage_list = []
+        self.decode_cache = decode_cache
+        self.layout = layout
         self.received_timestamp = datetime.now()
 
-        # Currently, only robot state messages are implemented.
+        # Robot state messages consist of subpackages; robot messages and program state
+        # messages carry a single message.
         if self.type == 16:
             self.read_subpackages(robot_data)
+        elif self.type in (20, 25):
+            self.read_message(robot_data)
 
     def get_package_length(self, robot_data: str) -> int:
         """
@@ -105,24 +119,51 @@ class Package:
         This function iterates through the robot_data, which is a hexadecimal string
         representing binary data containing robot parameters encoded as a package consisting of
         subpackages. It uses the factory class pattern to create SubPackage instances at runtime
-        and appends them to the subpackage_list.
+        and appends them to the subpackage_list. When a layout decoder is set, it creates the
+        subpackages instead of the factory, and when a decode cache is set, unchanged
+        subpackages are reused from it. Subpackages hold memoryview slices of the robot data
+        rather than copies of their bytes.
 
         Args:
             robot_data (str): A hexadecimal string representing binary data with robot parameters
                             encoded as packages and subpackages.
         """
+        factory = self.layout.create_subpackage if self.layout is not None else SubPackage.create_subpackage
+        robot_view = memoryview(robot_data)
         current_position = 5 # First 5 bytes already decoded.
         while current_position < len(robot_data):
 
             subpackage_length = struct.unpack('>I', robot_data[current_position:current_position+4])[0]
             subpackage_type = struct.unpack('>B', robot_data[current_position+4:current_position+5])[0]
-            subpackage_data = robot_data[current_position:subpackage_length+current_position]
+            subpackage_data = robot_view[current_position:subpackage_length+current_position]
             
-            new_subpackage = SubPackage.create_subpackage(self.type, subpackage_data, subpackage_length, subpackage_type)
+            if self.decode_cache is not None:
+                new_subpackage = self.decode_cache.create_subpackage(self.type, subpackage_data, subpackage_length, subpackage_type, self.layout)
+            else:
+                new_subpackage = factory(self.type, subpackage_data, subpackage_length, subpackage_type)
             self.subpackage_list.append(new_subpackage)
 
             current_position += subpackage_length
 
+    def read_message(self, robot_data) -> None:
+        """
+        Read a robot message or program state message and append it to the subpackage_list.
+
+        These packages are not divided into subpackages; the whole message is decoded as one
+        SubPackage, created by the same factory, with its message type in place of the
+        subpackage type.
+
+        Args:
+            robot_data (str): A hexadecimal string representing binary data with robot parameters
+                            encoded as packages and subpackages.
+        """
+        # Robot messages carry a source between the timestamp and the message type.
+        message_type_position = 14 if self.type == 20 else 13
+        message_type = struct.unpack('>B', robot_data[message_type_position:message_type_position+1])[0]
+
+        new_subpackage = SubPackage.create_subpackage(self.type, robot_data, self.length, message_type)
+        self.subpackage_list.append(new_subpackage)
+
     def get_subpackage(self, target_subpackage_name):
         """
         Retrieve a subpackage object from the package's subpackage_list based on its name.
@@ -138,6 +179,25 @@ class Package:
                 return subpackage
         return None
     
+    def get_flattened_variables(self) -> dict:
+        """
+        Retrieve every subpackage variable keyed by its flattened name.
+
+        Flattened names prepend the owning subpackage name to the variable name and replace
+        spaces with underscores, e.g. `Joint_Data_Joint2_T_motor`. This is the same naming
+        used by custom reports.
+
+        Returns:
+            dict: A mapping of flattened variable names to their values.
+        """
+        flattened = {}
+        for subpackage in self.subpackage_list:
+            subpackage_name = subpackage.subpackage_name.replace(' ', '_')
+            variables = subpackage.subpackage_variables
+            for field, value in zip(variables._fields, variables):
+                flattened[f"{subpackage_name}_{field}"] = value
+        return flattened
+
     def __str__(self) -> str:
         """
         Generate a string for the Package object, including tables for all its SubPackage objects.
@@ -155,3 +215,32 @@ class Package:
 
         return string
 
+
+def resolve_field_name(field_name, flattened_names):
+    """
+    Resolve a variable name to exactly one flattened name.
+
+    A flattened name such as `Joint_Data_Joint2_T_motor` resolves to itself. A bare variable
+    name such as `Joint2_T_motor` resolves to the flattened name ending with it, provided no
+    other subpackage shares the variable name.
+
+    Args:
+        field_name (str): A flattened or bare variable name.
+        flattened_names (iterable): The flattened names available.
+
+    Returns:
+        str: The matching flattened name.
+
+    Raises:
+        KeyError: If the name is unknown or shared by several subpackages.
+    """
+    flattened_names = list(flattened_names)
+    if field_name in flattened_names:
+        return field_name
+
+    matches = [name for name in flattened_names if name.endswith(f"_{field_name}")]
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        raise KeyError(f"Unknown variable: {field_name}")
+    raise KeyError(f"Variable {field_name} is ambiguous; use one of {', '.join(matches)}")
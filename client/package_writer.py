@@ -35,10 +35,11 @@ from tabulate import tabulate
 from collections import deque
 from collections import namedtuple
 from datetime import datetime
+from memory import MemoryUsage, deep_sizeof
 
 class PackageWriter:
 
-    def __init__(self, max_packages, custom_report):
+    def __init__(self, max_packages, custom_report, memory_budget=None, spill=False):
         
         self.max_packages = max_packages
         self.custom_report = None
@@ -74,6 +75,16 @@ class PackageWriter:
         self.package_counts = [(key, 0) for key, _ in self.file_paths]
         self.package_deques = {key: deque(maxlen=self.max_packages) for key, _ in self.file_paths}
 
+        # Tracks the bytes held by each deque. When the buffers together exceed `memory_budget`
+        # bytes, the oldest reports are evicted, or appended to output/spill when `spill` is set.
+        self.memory_budget = memory_budget
+        self.spill = spill
+        self.spill_directory = os.path.join(output_directory, "spill")
+        self.buffer_bytes = {key: 0 for key, _ in self.file_paths}
+        self.custom_reports_bytes = 0
+        self.evicted = 0
+        self.spilled = 0
+
 
     # Function writes all subpackages within `package` to file `packagetype`.txt .
     def append_package_to_file(self, package):
@@ -92,7 +103,15 @@ class PackageWriter:
 
         # Performs write operation to file. 
         if file_path:
-            self.package_deques[message_type].append(f"{package}\n{'#' * 80}\n")
+            package_deque = self.package_deques[message_type]
+            report = f"{package}\n{'#' * 80}\n"
+            # A deque with maxlen 0, i.e. `-m 0`, keeps nothing.
+            if package_deque.maxlen:
+                if len(package_deque) == package_deque.maxlen:
+                    self.buffer_bytes[message_type] -= sys.getsizeof(package_deque[0])
+                package_deque.append(report)
+                self.buffer_bytes[message_type] += sys.getsizeof(report)
+            self.enforce_memory_budget()
             with open(file_path, "w") as file:
                 for pkg_str in self.package_deques[message_type]:
                     file.write(pkg_str)
@@ -114,7 +133,12 @@ class PackageWriter:
         table_data = [timestamp] + [getattr(self.custom_report, field) for field in self.custom_report._fields]
 
         # Append the table data to custom_reports_deque
-        self.custom_reports_deque.append(table_data)
+        if self.custom_reports_deque.maxlen:
+            if len(self.custom_reports_deque) == self.custom_reports_deque.maxlen:
+                self.custom_reports_bytes -= deep_sizeof(self.custom_reports_deque[0])
+            self.custom_reports_deque.append(table_data)
+            self.custom_reports_bytes += deep_sizeof(table_data)
+        self.enforce_memory_budget()
 
         # Create headers
         headers = ["Timestamp"] + list(self.custom_report._fields)
@@ -126,6 +150,51 @@ class PackageWriter:
             file.write(tabulate(self.custom_reports_deque, headers=headers, tablefmt='grid'))
 
 
+    def memory_usage(self):
+        usage = [
+            MemoryUsage(None, os.path.basename(path), key, len(self.package_deques[key]), self.buffer_bytes[key])
+            for key, path in self.file_paths
+        ]
+        if hasattr(self, "custom_reports_deque"):
+            usage.append(MemoryUsage(None, "custom_report.txt", None, len(self.custom_reports_deque), self.custom_reports_bytes))
+        return usage
+
+    def memory_total(self):
+        return sum(self.buffer_bytes.values()) + self.custom_reports_bytes
+
+    # Evicts the oldest report of the largest buffer until the buffers fit in the budget.
+    # The newest report of every buffer is always kept.
+    def enforce_memory_budget(self):
+        if self.memory_budget is None:
+            return
+
+        while self.memory_total() > self.memory_budget:
+            candidates = [(size, key) for key, size in self.buffer_bytes.items() if len(self.package_deques[key]) > 1]
+            if hasattr(self, "custom_reports_deque") and len(self.custom_reports_deque) > 1:
+                candidates.append((self.custom_reports_bytes, None))
+            if not candidates:
+                break
+
+            _, key = max(candidates, key=lambda candidate: candidate[0])
+            if key is None:
+                row = self.custom_reports_deque.popleft()
+                self.custom_reports_bytes -= deep_sizeof(row)
+                self.spill_report("custom_report.txt", ", ".join(str(value) for value in row) + "\n")
+            else:
+                report = self.package_deques[key].popleft()
+                self.buffer_bytes[key] -= sys.getsizeof(report)
+                self.spill_report(os.path.basename(dict(self.file_paths)[key]), report)
+            self.evicted += 1
+
+    def spill_report(self, file_name, report):
+        if not self.spill:
+            return
+        if not os.path.exists(self.spill_directory):
+            os.makedirs(self.spill_directory)
+        with open(os.path.join(self.spill_directory, file_name), "a") as file:
+            file.write(report)
+        self.spilled += 1
+
     def print_package_counts(self):
         sys.stdout.write("\r")
         sys.stdout.write(f"RECEIVED: {self.package_counts[0][0]}:{self.package_counts[0][1]}, {self.package_counts[1][0]}:{self.package_counts[1][1]}, {self.package_counts[2][0]}:{self.package_counts[2][1]}, {self.package_counts[3][0]}:{self.package_counts[3][1]}, {self.package_counts[4][0]}:{self.package_counts[4][1]}, {self.package_counts[5][0]}:{self.package_counts[5][1]}, {self.package_counts[6][0]}:{self.package_counts[6][1]}, {self.package_counts[7][0]}:{self.package_counts[7][1]}")
@@ -0,0 +1,601 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import asyncio
+import csv
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import Counter
+from package import Package, resolve_field_name
+from projection import FieldProjection
+
+PRIMARY_PORT = 30001
+
+################################ SOURCES ################################
+
+def socket_source(host, port=PRIMARY_PORT, timeout=4, buffer_size=4096):
+    """
+    Connect to a controller and yield received bytes until the connection closes.
+
+    Args:
+        host (str): The controller's IP address.
+        port (int): The interface port.
+        timeout (float): The connect and receive timeout in seconds.
+        buffer_size (int): The maximum number of bytes per receive.
+
+    Yields:
+        bytes: Received chunks; chunks do not follow message boundaries.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as client_socket:
+        yield from receive_chunks(client_socket, buffer_size)
+
+
+def receive_chunks(client_socket, buffer_size=4096):
+    """
+    Yield bytes received on an already connected socket until the connection closes.
+
+    Args:
+        client_socket (socket.socket): A connected socket.
+        buffer_size (int): The maximum number of bytes per receive.
+
+    Yields:
+        bytes: Received chunks; chunks do not follow message boundaries.
+    """
+    while True:
+        chunk = client_socket.recv(buffer_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def async_socket_source(host, port=PRIMARY_PORT, buffer_size=4096):
+    """
+    Connect to a controller with asyncio and yield received bytes until the connection closes.
+
+    Args:
+        host (str): The controller's IP address.
+        port (int): The interface port.
+        buffer_size (int): The maximum number of bytes per read.
+
+    Yields:
+        bytes: Received chunks; chunks do not follow message boundaries.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            chunk = await reader.read(buffer_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def file_source(file_path, chunk_size=65536):
+    """
+    Yield the bytes of a capture file.
+
+    Capture files hold messages exactly as received from the controller, one after the
+    other, as written by `capture_sink` or the trigger engine.
+
+    Args:
+        file_path (str): The capture file path.
+        chunk_size (int): The number of bytes per read.
+
+    Yields:
+        bytes: File chunks; chunks do not follow message boundaries.
+    """
+    with open(file_path, "rb") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class MockServer:
+    """
+    A local stand-in for a controller that replays messages to every client that connects.
+
+    Attributes:
+        frames (list): The serialized messages sent to each client.
+        period (float): The delay between messages in seconds.
+        repeat (bool): Whether to replay the messages until the client disconnects.
+        address (tuple): The (host, port) the server listens on once started.
+
+    Methods:
+        start: Start serving in a background thread.
+        stop: Stop serving and close the listening socket.
+    """
+
+    def __init__(self, frames, host="127.0.0.1", port=0, period=0.0, repeat=False):
+        self.frames = list(frames)
+        self.period = period
+        self.repeat = repeat
+        self.server = None
+        self.thread = None
+        self.address = (host, port)
+
+    def start(self):
+        mock = self
+
+        class ReplayHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                try:
+                    while True:
+                        for frame in mock.frames:
+                            self.request.sendall(frame)
+                            if mock.period:
+                                time.sleep(mock.period)
+                        if not mock.repeat:
+                            return
+                except OSError:
+                    return
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(self.address, ReplayHandler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+################################ STAGES ################################
+
+class ReceivedFrame(bytes):
+    """
+    A serialized message stamped with the host monotonic time its last byte was received.
+
+    It is used wherever bytes are, so stages that store or slice frames are unaffected.
+
+    Attributes:
+        received_monotonic (float): A `time.monotonic()` reading, in seconds.
+    """
+
+    def __new__(cls, data, received_monotonic):
+        frame = super().__new__(cls, data)
+        frame.received_monotonic = received_monotonic
+        return frame
+
+
+class Framer:
+    """
+    Reassembles a byte stream into whole messages using their 4-byte length headers.
+
+    Attributes:
+        minimum_length (int): The smallest valid message length.
+        buffer (bytearray): Bytes received but not yet returned as a message.
+
+    Methods:
+        feed: Append received bytes and return every completed message.
+    """
+
+    def __init__(self, minimum_length=5):
+        self.minimum_length = minimum_length
+        self.buffer = bytearray()
+
+    def feed(self, chunk, received_monotonic=None) -> list:
+        """
+        Append received bytes and return every completed message.
+
+        Args:
+            chunk (bytes): Received bytes.
+            received_monotonic (float): When the chunk was received; `time.monotonic()` at the
+                                        call by default. Messages completed by the chunk carry it.
+
+        Returns:
+            list: The completed messages as ReceivedFrame objects, in order.
+
+        Raises:
+            ValueError: If a length header is smaller than `minimum_length`.
+        """
+        if received_monotonic is None:
+            received_monotonic = time.monotonic()
+        buffer = self.buffer
+        buffer += chunk
+        frames = []
+        position = 0
+        while len(buffer) - position >= 4:
+            length = struct.unpack_from('>I', buffer, position)[0]
+            if length < self.minimum_length:
+                raise ValueError(f"Invalid message length {length}; stream is out of sync.")
+            if len(buffer) - position < length:
+                break
+            frames.append(ReceivedFrame(buffer[position:position + length], received_monotonic))
+            position += length
+        del buffer[:position]
+        return frames
+
+
+def frame(chunks, minimum_length=5):
+    """
+    Reassemble received bytes into whole messages.
+
+    Args:
+        chunks (iterable): Received bytes, e.g. from a source.
+        minimum_length (int): The smallest valid message length.
+
+    Yields:
+        bytes: One serialized message at a time.
+    """
+    framer = Framer(minimum_length)
+    for chunk in chunks:
+        yield from framer.feed(chunk)
+
+
+async def async_frame(chunks, minimum_length=5):
+    """
+    Reassemble bytes from an asynchronous source into whole messages.
+
+    Args:
+        chunks (async iterable): Received bytes, e.g. from `async_socket_source`.
+        minimum_length (int): The smallest valid message length.
+
+    Yields:
+        bytes: One serialized message at a time.
+    """
+    framer = Framer(minimum_length)
+    async for chunk in chunks:
+        for complete_frame in framer.feed(chunk):
+            yield complete_frame
+
+
+def decode(frames, decode_cache=None, layout=None):
+    """
+    Deserialize messages into Package objects.
+
+    Packages keep the receive time of frames from `frame`, so it is not delayed by the work
+    done on earlier packages while later frames wait in this lazy pipeline.
+
+    Args:
+        frames (iterable): Serialized messages.
+        decode_cache (DecodeCache): An optional cache used to reuse unchanged subpackages.
+        layout (LayoutDecoder): An optional layout decoder for the connection. It selects its
+                                layout table from the version message sent on connect.
+
+    Yields:
+        Package: One package per message.
+    """
+    for robot_data in frames:
+        received_monotonic = getattr(robot_data, "received_monotonic", None)
+        package = Package(robot_data, decode_cache, layout, received_monotonic)
+        if layout is not None and package.type == 20:
+            layout.update(package)
+        yield package
+
+
+def project(packages, fields):
+    """
+    Reduce robot state packages to the chosen variables.
+
+    Field names are resolved once, against the first robot state package. Packages of other
+    types are skipped, and variables missing from a package are reported as None.
+
+    Args:
+        packages (iterable): Decoded packages.
+        fields (list): Flattened or unambiguous bare variable names.
+
+    Yields:
+        dict: The package's receive time under `received_timestamp` followed by the fields.
+    """
+    resolved = None
+    for package in packages:
+        if package.type != 16 or not package.subpackage_list:
+            continue
+        flattened = package.get_flattened_variables()
+        if resolved is None:
+            resolved = [(field, resolve_field_name(field, flattened)) for field in fields]
+
+        row = {"received_timestamp": package.received_timestamp}
+        for field, flattened_name in resolved:
+            row[field] = flattened.get(flattened_name)
+        yield row
+
+
+def extract(frames, fields, layout=None):
+    """
+    Reduce serialized robot state messages to the chosen variables without decoding packages.
+
+    A faster alternative to `decode` followed by `project` for consumers that need only a
+    few variables. Messages of other types are skipped.
+
+    Args:
+        frames (iterable): Serialized messages.
+        fields (list): Flattened or unambiguous bare variable names.
+        layout (LayoutDecoder): An optional layout decoder for the connection. It selects its
+                                layout table from the version message sent on connect.
+
+    Yields:
+        dict: The fields, with None for variables missing from a message.
+    """
+    projection = FieldProjection(fields, layout=layout)
+    for robot_data in frames:
+        values = projection.extract(robot_data)
+        if values is not None:
+            yield dict(zip(projection.fields, values))
+
+
+def sample(stream, every=1, max_rate=None):
+    """
+    Thin out a stream by count and/or by rate.
+
+    Args:
+        stream (iterable): Any items.
+        every (int): Keep one item out of every `every`.
+        max_rate (float): The maximum number of items per second to keep, or None.
+
+    Yields:
+        The kept items.
+    """
+    minimum_interval = 1.0 / max_rate if max_rate else 0.0
+    last_kept = None
+    for index, item in enumerate(stream):
+        if index % every:
+            continue
+        if minimum_interval:
+            now = time.monotonic()
+            if last_kept is not None and now - last_kept < minimum_interval:
+                continue
+            last_kept = now
+        yield item
+
+
+def aggregate(rows, size, function=None):
+    """
+    Combine consecutive rows into one row per group of `size`.
+
+    Numeric values are combined by `function`, the mean by default; other values keep the
+    group's last value. A final partial group is emitted when the stream ends.
+
+    Args:
+        rows (iterable): Dictionaries such as those produced by `project`.
+        size (int): The number of rows per group.
+        function (callable): Combines a list of numbers into one value.
+
+    Yields:
+        dict: One row per group.
+    """
+    if function is None:
+        function = lambda values: sum(values) / len(values)
+
+    for group in batch(rows, size):
+        combined = {}
+        for key, last_value in group[-1].items():
+            values = [row.get(key) for row in group]
+            if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+                combined[key] = function(values)
+            else:
+                combined[key] = last_value
+        yield combined
+
+
+def batch(stream, size):
+    """
+    Group a stream into lists of up to `size` items.
+
+    Args:
+        stream (iterable): Any items.
+        size (int): The number of items per list.
+
+    Yields:
+        list: Consecutive items; the last list may be shorter.
+    """
+    group = []
+    for item in stream:
+        group.append(item)
+        if len(group) == size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def unbatch(batches):
+    """
+    Flatten lists produced by `batch` back into single items.
+
+    Args:
+        batches (iterable): Lists of items.
+
+    Yields:
+        One item at a time.
+    """
+    for group in batches:
+        yield from group
+
+
+################################# SINKS #################################
+
+def text_sink(packages, writer) -> int:
+    """
+    Write packages with a PackageWriter, including custom reports when enabled.
+
+    Args:
+        packages (iterable): Decoded packages.
+        writer (PackageWriter): The writer managing the output files.
+
+    Returns:
+        int: The number of packages written.
+    """
+    count = 0
+    for package in packages:
+        writer.append_package_to_file(package)
+        if writer.custom_reports_enabled == True:
+            writer.append_custom_report(package)
+        count += 1
+    return count
+
+
+def csv_sink(rows, file_path, fields=None) -> int:
+    """
+    Write rows to a CSV file.
+
+    Args:
+        rows (iterable): Dictionaries such as those produced by `project`.
+        file_path (str): The CSV file path; an existing file is replaced.
+        fields (list): The column order; defaults to the keys of the first row.
+
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    with open(file_path, "w", newline="") as file:
+        csv_writer = None
+        for row in rows:
+            if csv_writer is None:
+                csv_writer = csv.DictWriter(file, fieldnames=fields or list(row), extrasaction="ignore")
+                csv_writer.writeheader()
+            csv_writer.writerow(row)
+            count += 1
+    return count
+
+
+def capture_sink(frames, file_path) -> int:
+    """
+    Write serialized messages to a capture file readable by `file_source`.
+
+    Args:
+        frames (iterable): Serialized messages, e.g. from `frame`.
+        file_path (str): The capture file path; an existing file is replaced.
+
+    Returns:
+        int: The number of messages written.
+    """
+    count = 0
+    with open(file_path, "wb") as file:
+        for robot_data in frames:
+            file.write(robot_data)
+            count += 1
+    return count
+
+
+class PipelineMetrics:
+    """
+    Counters describing the items that reached a metrics sink.
+
+    Attributes:
+        items (int): The number of items consumed.
+        package_types (Counter): The number of packages consumed per package type.
+        started (float): The monotonic time the first item arrived.
+        last (float): The monotonic time the latest item arrived.
+
+    Methods:
+        rate: Report the average number of items per second.
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.package_types = Counter()
+        self.started = None
+        self.last = None
+
+    def rate(self) -> float:
+        if self.items < 2 or self.last == self.started:
+            return 0.0
+        return (self.items - 1) / (self.last - self.started)
+
+    def __str__(self):
+        types = ", ".join(f"{key}:{value}" for key, value in sorted(self.package_types.items()))
+        return f"ITEMS: {self.items}, RATE: {self.rate():.2f}/s, TYPES: {types}"
+
+
+def metrics_sink(stream, metrics=None):
+    """
+    Consume a stream while counting its items.
+
+    Args:
+        stream (iterable): Any items; packages are also counted per package type.
+        metrics (PipelineMetrics): Counters to update, so they can be read while running.
+
+    Returns:
+        PipelineMetrics: The updated counters.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics()
+    for item in stream:
+        now = time.monotonic()
+        if metrics.started is None:
+            metrics.started = now
+        metrics.last = now
+        metrics.items += 1
+        if isinstance(item, Package):
+            metrics.package_types[item.type] += 1
+    return metrics
+
+
+############################### PIPELINE ###############################
+
+class Pipeline:
+    """
+    Chains a source, stages and a sink lazily.
+
+    Every stage is a generator function taking the upstream iterable as its first argument,
+    so nothing is received, decoded or stored until the sink pulls items through. Items pass
+    between stages one at a time; `batch` and `unbatch` are stages themselves and group the
+    stream where a consumer benefits from lists, e.g. `.then(batch, 100)` ahead of a sink.
+
+    Example:
+        Pipeline(socket_source(ip)).then(frame).then(decode).then(project, ["X", "Y"]).into(csv_sink, "tcp.csv")
+
+    Methods:
+        then: Append a stage.
+        into: Run the pipeline into a sink.
+    """
+
+    def __init__(self, source):
+        self.stream = source
+
+    def then(self, stage, *args, **kwargs):
+        self.stream = stage(self.stream, *args, **kwargs)
+        return self
+
+    def into(self, sink, *args, **kwargs):
+        return sink(self.stream, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self.stream)
@@ -0,0 +1,181 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import struct
+from layouts import LAYOUT_TABLES, layout_version, layout_length, layout_codes
+from package import Package, resolve_field_name
+
+class SubPackageExtractor:
+    """
+    Extracts the requested variables of one subpackage variant with a single precompiled Struct.
+
+    Variables that are not requested become pad bytes, so one `unpack_from` call returns
+    exactly the requested values. Requested variables the variant does not send are set to
+    the layout's constant.
+    """
+
+    def __init__(self, wanted, constants):
+        # wanted: (byte offset within the subpackage, struct code, output index), in any order.
+        format_string = '>'
+        position = 0
+        self.indices = []
+        for offset, code, index in sorted(wanted):
+            if offset > position:
+                format_string += f"{offset - position}x"
+            format_string += code
+            position = offset + struct.calcsize(f">{code}")
+            self.indices.append(index)
+        self.structure = struct.Struct(format_string)
+        self.constants = constants
+
+    def extract(self, data, position, values):
+        for index, value in zip(self.indices, self.structure.unpack_from(data, position)):
+            values[index] = value
+        for index, value in self.constants:
+            values[index] = value
+
+
+class FieldProjection:
+    """
+    Extracts chosen variables straight from raw robot state messages.
+
+    The requested names are compiled once into (subpackage type, byte offset, struct code)
+    triples using the subpackage layout table of `layouts.py`. Each message is then handled by
+    a single scan over the subpackage headers, unpacking only the subpackages that hold
+    requested variables, without creating SubPackage objects or named tuples. Subpackage
+    variants, such as Master Board Data with or without a Euromap67 interface, are told apart
+    by their length.
+
+    Names are flattened names, e.g. `Cartesian_Info_X`, or unambiguous bare names, e.g.
+    `X` or `Joint1_q_actual`. Values match those of `Package.get_flattened_variables`,
+    including the converted Robot Mode Data timestamp and "Not used" for Euromap67 values
+    when no interface is installed. Variables missing from a message are None.
+
+    Given the connection's LayoutDecoder, the projection follows its layout table: version
+    messages passed to `extract` update the decoder, and the triples are recompiled when the
+    decoder's table changes.
+
+    Attributes:
+        fields (list): The requested names.
+        flattened_names (list): The flattened name of each requested variable.
+        version (tuple): The (major, minor) key of the layout table used.
+        layout (LayoutDecoder): The connection's layout decoder, or None.
+
+    Methods:
+        compile: Compile the requested names against a layout table.
+        extract: Extract the requested variables from a raw message.
+    """
+
+    def __init__(self, fields, version=None, layout=None):
+        self.fields = list(fields)
+        self.layout = layout
+        if layout is not None:
+            self.compile(layout.version)
+        else:
+            self.compile(layout_version(*version) if version else max(LAYOUT_TABLES))
+
+    def compile(self, version):
+        """
+        Compile the requested names against a layout table.
+
+        Args:
+            version (tuple): The (major, minor) key of a table in `LAYOUT_TABLES`.
+        """
+        self.version = version
+        layouts = LAYOUT_TABLES[self.version]
+
+        catalogue = {}
+        for layout in layouts:
+            prefix = layout.subpackage_name.replace(' ', '_')
+            for field in layout.field_names:
+                catalogue[f"{prefix}_{field}"] = layout
+        self.flattened_names = [resolve_field_name(field, catalogue) for field in self.fields]
+        requested = {name: index for index, name in enumerate(self.flattened_names)}
+
+        self.extractors = {}
+        self.converters = []
+        for layout in layouts:
+            prefix = layout.subpackage_name.replace(' ', '_')
+            wanted = []
+            offset = 5
+            for field, code in layout_codes(layout):
+                index = requested.get(f"{prefix}_{field}")
+                if index is not None:
+                    wanted.append((offset, code, index))
+                offset += struct.calcsize(f">{code}")
+            constants = [(requested[f"{prefix}_{field}"], value) for field, value in layout.constants.items()
+                         if f"{prefix}_{field}" in requested]
+            if wanted or constants:
+                self.extractors[(layout.subpackage_type, layout_length(layout))] = SubPackageExtractor(wanted, constants)
+
+            for field, converter in layout.converters.items():
+                index = requested.get(f"{prefix}_{field}")
+                if index is not None and (index, converter) not in self.converters:
+                    self.converters.append((index, converter))
+
+        self.width = len(self.fields)
+
+    def extract(self, robot_data):
+        """
+        Extract the requested variables from a raw message.
+
+        Args:
+            robot_data (bytes): A whole message, e.g. from the pipeline's framer.
+
+        Returns:
+            tuple: The requested values in request order, or None if the message is not a
+                   robot state message.
+        """
+        if robot_data[4] != 16:
+            if robot_data[4] == 20 and self.layout is not None:
+                self.layout.update(Package(robot_data))
+            return None
+        if self.layout is not None and self.layout.version != self.version:
+            self.compile(self.layout.version)
+
+        values = [None] * self.width
+        extractors = self.extractors
+        unpack_header = struct.Struct('>IB').unpack_from
+        position = 5
+        end = len(robot_data)
+        while position < end:
+            length, subpackage_type = unpack_header(robot_data, position)
+            if length == 0:
+                break
+            extractor = extractors.get((subpackage_type, length))
+            if extractor is not None:
+                extractor.extract(robot_data, position, values)
+            position += length
+
+        for index, converter in self.converters:
+            if values[index] is not None:
+                values[index] = converter(values[index])
+        return tuple(values)
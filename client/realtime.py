@@ -0,0 +1,421 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import math
+import selectors
+import socket
+import socketserver
+import struct
+import threading
+import time
+from tabulate import tabulate
+
+REALTIME_PORT = 30003
+
+# Realtime interface message layout as (variable name, number of doubles), in wire order.
+# Every message starts with a 4-byte length; the values that follow are big-endian doubles.
+REALTIME_LAYOUT = [
+    ("time", 1),
+    ("q_target", 6),
+    ("qd_target", 6),
+    ("qdd_target", 6),
+    ("I_target", 6),
+    ("M_target", 6),
+    ("q_actual", 6),
+    ("qd_actual", 6),
+    ("I_actual", 6),
+    ("I_control", 6),
+    ("Tool_vector_actual", 6),
+    ("TCP_speed_actual", 6),
+    ("TCP_force", 6),
+    ("Tool_vector_target", 6),
+    ("TCP_speed_target", 6),
+    ("Digital_input_bits", 1),
+    ("Motor_temperatures", 6),
+    ("Controller_Timer", 1),
+    ("Test_value", 1),
+    ("Robot_Mode", 1),
+    ("Joint_Modes", 6),
+    ("Safety_Mode", 1),
+    ("empty1", 6),
+    ("Tool_Accelerometer_values", 3),
+    ("empty2", 6),
+    ("Speed_scaling", 1),
+    ("Linear_momentum_norm", 1),
+    ("SoftwareOnly", 1),
+    ("softwareOnly2", 1),
+    ("V_main", 1),
+    ("V_robot", 1),
+    ("I_robot", 1),
+    ("V_actual", 6),
+    ("Digital_outputs", 1),
+    ("Program_state", 1),
+    ("Elbow_position", 3),
+    ("Elbow_velocity", 3),
+    ("Safety_Status", 1)
+]
+
+class RealtimeLayout:
+    """
+    A precompiled decoder for one realtime message size.
+
+    The whole message is decoded with a single `struct.Struct`. Messages longer than the
+    layout, sent by newer controllers, are decoded up to the layout's last variable.
+
+    Attributes:
+        fields (list): The (variable name, number of doubles) pairs decoded.
+        size (int): The message size in bytes, including the length header.
+        structure (Struct): The precompiled decoder.
+        slices (dict): Variable name to (first index, number of doubles) within the values.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        count = sum(width for _, width in fields)
+        self.structure = struct.Struct(f">4x{count}d")
+        self.size = self.structure.size
+        self.slices = {}
+        index = 0
+        for name, width in fields:
+            self.slices[name] = (index, width)
+            index += width
+
+
+# Controllers before Safety Status was added send 1108 bytes; later ones send 1116 or more.
+REALTIME_LAYOUTS = [
+    RealtimeLayout(REALTIME_LAYOUT[:-1]),
+    RealtimeLayout(REALTIME_LAYOUT)
+]
+
+def layout_for_length(length):
+    """
+    Select the largest layout a realtime message can be decoded with.
+
+    Args:
+        length (int): The message length from its header.
+
+    Returns:
+        RealtimeLayout: The matching layout, or None if the message is too short.
+    """
+    selected = None
+    for layout in REALTIME_LAYOUTS:
+        if layout.size <= length:
+            selected = layout
+    return selected
+
+
+class RealtimeState:
+    """
+    A preallocated record holding the latest realtime message.
+
+    Each decode overwrites the record in place, so a client reuses one record for every
+    message. Variables are read as attributes, e.g. `state.q_actual` or `state.time`;
+    six-value variables are returned as tuples.
+
+    Attributes:
+        length (int): The length of the latest message.
+        layout (RealtimeLayout): The layout used for the latest message.
+        values (list): The decoded doubles in wire order.
+
+    Methods:
+        decode: Decode a message from a buffer into the record.
+        get: Retrieve a variable by name.
+        get_flattened_variables: Retrieve every variable with vectors split per element.
+        __str__: Generate a table of the record's variables.
+    """
+
+    __slots__ = ("length", "layout", "values")
+
+    def __init__(self):
+        self.length = 0
+        self.layout = REALTIME_LAYOUTS[-1]
+        self.values = [0.0] * (self.layout.size // 8)
+
+    def decode(self, buffer, offset=0) -> bool:
+        """
+        Decode a message from a buffer into the record.
+
+        Args:
+            buffer (bytes-like): A buffer holding a whole message at `offset`.
+            offset (int): The position of the message's length header.
+
+        Returns:
+            bool: True if decoded, False if the message is shorter than every known layout.
+        """
+        length = struct.unpack_from('>I', buffer, offset)[0]
+        # Consecutive messages almost always share a length; reuse the previous layout.
+        if length == self.length:
+            layout = self.layout
+        else:
+            layout = layout_for_length(length)
+        if layout is None:
+            return False
+
+        self.length = length
+        self.layout = layout
+        self.values[:] = layout.structure.unpack_from(buffer, offset)
+        return True
+
+    def get(self, name):
+        index, width = self.layout.slices[name]
+        if width == 1:
+            return self.values[index]
+        return tuple(self.values[index:index + width])
+
+    def __getattr__(self, name):
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def get_flattened_variables(self) -> dict:
+        flattened = {}
+        for name, (index, width) in self.layout.slices.items():
+            if width == 1:
+                flattened[name] = self.values[index]
+            else:
+                for element in range(width):
+                    flattened[f"{name}_{element + 1}"] = self.values[index + element]
+        return flattened
+
+    def __str__(self):
+        rows = [(name, self.get(name)) for name, _ in self.layout.fields]
+        table = tabulate(rows, headers=["Variable", "Value"], tablefmt="grid")
+        return f"Realtime State:\n{table}\n\n"
+
+
+class RealtimeClient:
+    """
+    A client for the realtime interface, which publishes at 125 Hz or 500 Hz.
+
+    Received bytes go into a preallocated buffer with `recv_into`, and every complete message
+    is decoded in place into `state`. Several clients can be served by one thread with
+    `poll_clients`.
+
+    Attributes:
+        address (tuple): The controller's (host, port).
+        state (RealtimeState): The record holding the latest message.
+        messages (int): The number of messages decoded.
+
+    Methods:
+        receive_available: Receive once and decode every complete message.
+        receive: Block until the next message has been decoded.
+        close: Close the connection.
+    """
+
+    def __init__(self, host, port=REALTIME_PORT, timeout=4, buffer_size=65536):
+        self.address = (host, port)
+        self.socket = socket.create_connection(self.address, timeout=timeout)
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.state = RealtimeState()
+        self.messages = 0
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def receive_available(self):
+        """
+        Receive once and decode every complete message.
+
+        Yields:
+            RealtimeState: The client's record after each message. The same object is
+                           yielded every time; copy values that must be kept.
+
+        Raises:
+            ConnectionError: If the controller closed the connection.
+        """
+        self.fill_buffer()
+        while self.decode_next():
+            yield self.state
+
+    def receive(self):
+        """
+        Block until the next message has been decoded.
+
+        Exactly one message is decoded per call; messages received along with it stay buffered
+        for the following calls, so no sample is skipped.
+
+        Returns:
+            RealtimeState: The client's record holding the next message.
+
+        Raises:
+            ConnectionError: If the controller closed the connection.
+        """
+        while not self.decode_next():
+            self.fill_buffer()
+        return self.state
+
+    def fill_buffer(self):
+        # Moves a trailing partial message to the front when the buffer is full.
+        if self.end == len(self.buffer):
+            remaining = self.end - self.start
+            self.buffer[0:remaining] = self.buffer[self.start:self.end]
+            self.start = 0
+            self.end = remaining
+
+        received = self.socket.recv_into(self.view[self.end:])
+        if received == 0:
+            raise ConnectionError(f"Connection to {self.address[0]}:{self.address[1]} closed")
+        self.end += received
+
+    def decode_next(self) -> bool:
+        # Decodes the next complete buffered message; messages of unknown layouts are skipped.
+        while self.end - self.start >= 4:
+            length = struct.unpack_from('>I', self.buffer, self.start)[0]
+            if length < 4 or length > len(self.buffer):
+                raise ValueError(f"Invalid message length {length}; stream is out of sync.")
+            if self.end - self.start < length:
+                break
+            decoded = self.state.decode(self.buffer, self.start)
+            self.start += length
+            if decoded:
+                self.messages += 1
+                return True
+
+        if self.start == self.end:
+            self.start = self.end = 0
+        return False
+
+    def close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def poll_clients(clients, timeout=None):
+    """
+    Serve several realtime clients from one thread.
+
+    Args:
+        clients (list): Connected RealtimeClient objects.
+        timeout (float): Stop after this many seconds without data, or None to wait forever.
+
+    Yields:
+        tuple: (client, state) for every message received, in arrival order. Clients whose
+               connection closes are dropped.
+    """
+    with selectors.DefaultSelector() as selector:
+        for client in clients:
+            selector.register(client, selectors.EVENT_READ)
+
+        while selector.get_map():
+            events = selector.select(timeout)
+            if not events:
+                return
+            for key, _ in events:
+                client = key.fileobj
+                try:
+                    for state in client.receive_available():
+                        yield client, state
+                except ConnectionError:
+                    selector.unregister(client)
+
+
+class RealtimeServer:
+    """
+    A local stand-in for the realtime interface used for tests and benchmarks.
+
+    Every client receives synthetic messages at `frequency`: `time` advances by the period,
+    `q_actual` and `q_target` hold sin(time + joint index), and `Robot_Mode` is 7 (running).
+
+    Attributes:
+        frequency (float): The number of messages sent per second.
+        layout (RealtimeLayout): The layout of the messages sent.
+        address (tuple): The (host, port) the server listens on once started.
+
+    Methods:
+        start: Start serving in a background thread.
+        stop: Stop serving and close the listening socket.
+        create_message: Serialize the message for a given sample number.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, frequency=500, layout=REALTIME_LAYOUTS[-1]):
+        self.frequency = frequency
+        self.layout = layout
+        self.address = (host, port)
+        self.server = None
+        self.packer = struct.Struct(f">I{layout.size // 8}d")
+
+    def create_message(self, sample) -> bytes:
+        values = [0.0] * (self.layout.size // 8)
+        elapsed = sample / self.frequency
+        values[0] = elapsed
+        for name in ("q_actual", "q_target"):
+            index, width = self.layout.slices[name]
+            for joint in range(width):
+                values[index + joint] = math.sin(elapsed + joint)
+        values[self.layout.slices["Robot_Mode"][0]] = 7.0
+        return self.packer.pack(self.layout.size, *values)
+
+    def start(self):
+        stand_in = self
+
+        class StreamHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                period = 1.0 / stand_in.frequency
+                next_send = time.monotonic()
+                sample = 0
+                try:
+                    while stand_in.server is not None:
+                        self.request.sendall(stand_in.create_message(sample))
+                        sample += 1
+                        next_send += period
+                        delay = next_send - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                except OSError:
+                    return
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(self.address, StreamHandler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        server, self.server = self.server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,410 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import math
+import socket
+import socketserver
+import struct
+import threading
+import time
+from datetime import datetime
+
+RTDE_PORT = 30004
+RTDE_PROTOCOL_VERSION = 2
+
+# Package types of the RTDE protocol.
+RTDE_REQUEST_PROTOCOL_VERSION = 86      # 'V'
+RTDE_GET_URCONTROL_VERSION = 118        # 'v'
+RTDE_TEXT_MESSAGE = 77                  # 'M'
+RTDE_DATA_PACKAGE = 85                  # 'U'
+RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS = 79 # 'O'
+RTDE_CONTROL_PACKAGE_START = 83         # 'S'
+RTDE_CONTROL_PACKAGE_PAUSE = 80         # 'P'
+
+# RTDE data types and their struct format codes.
+RTDE_TYPE_CODES = {
+    "BOOL": "?",
+    "UINT8": "B",
+    "UINT32": "I",
+    "UINT64": "Q",
+    "INT32": "i",
+    "DOUBLE": "d",
+    "VECTOR3D": "3d",
+    "VECTOR6D": "6d",
+    "VECTOR6INT32": "6i",
+    "VECTOR6UINT32": "6I"
+}
+
+class RTDERecipe:
+    """
+    An output recipe accepted by the controller, compiled into a single unpacker.
+
+    Vector variables are flattened into one value per element, named `actual_q_1` to
+    `actual_q_6`, so a data package decodes straight into a row with one `zip`.
+
+    Attributes:
+        recipe_id (int): The recipe id assigned by the controller.
+        variables (list): The requested variable names.
+        types (list): The RTDE data type of each variable.
+        names (list): The flattened names of the decoded values.
+        structure (Struct): Decodes a whole data package payload, recipe id included.
+    """
+
+    def __init__(self, recipe_id, variables, types):
+        self.recipe_id = recipe_id
+        self.variables = list(variables)
+        self.types = list(types)
+
+        rejected = [f"{variable} ({data_type})" for variable, data_type in zip(self.variables, self.types) if data_type not in RTDE_TYPE_CODES]
+        if rejected:
+            raise ValueError(f"Controller rejected RTDE outputs: {', '.join(rejected)}")
+
+        codes = ""
+        self.names = []
+        for variable, data_type in zip(self.variables, self.types):
+            code = RTDE_TYPE_CODES[data_type]
+            codes += code
+            width = int(code[0]) if len(code) == 2 else 1
+            if width == 1:
+                self.names.append(variable)
+            else:
+                self.names.extend(f"{variable}_{element + 1}" for element in range(width))
+
+        self.structure = struct.Struct(f">B{codes}")
+
+    def decode(self, data) -> dict:
+        """
+        Decode a data package payload into a row.
+
+        Args:
+            data (bytes): A data package payload, starting with the recipe id.
+
+        Returns:
+            dict: Flattened variable names mapped to their values.
+        """
+        values = self.structure.unpack_from(data)
+        return dict(zip(self.names, values[1:]))
+
+
+def read_recipe(file_path):
+    """
+    Read RTDE output variable names from a file, one per line, ignoring blanks and # comments.
+
+    Args:
+        file_path (str): The recipe file path, e.g. `rtde_watch_list.txt`.
+
+    Returns:
+        list: The variable names in file order.
+    """
+    variables = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            variable = line.split('#')[0].strip()
+            if variable:
+                variables.append(variable)
+    return variables
+
+
+class RTDEClient:
+    """
+    A client for the RTDE interface subscribing to a chosen set of variables.
+
+    Unlike the primary interface, RTDE only sends the variables in the negotiated output
+    recipe, at the requested frequency. Each sample is a dictionary of flattened names to
+    values, so it can be fed into the same sinks as projected packages, e.g.
+    `Pipeline(client.samples()).into(csv_sink, "rtde.csv")`.
+
+    Attributes:
+        address (tuple): The controller's (host, port).
+        recipe (RTDERecipe): The output recipe, once set up.
+        controller_version (tuple): (major, minor, bugfix, build), once requested.
+        text_messages (list): Text messages received from the controller.
+
+    Methods:
+        negotiate_protocol_version: Request protocol version 2.
+        get_controller_version: Request the controller's software version.
+        setup_outputs: Negotiate an output recipe.
+        start: Start receiving data packages.
+        pause: Stop receiving data packages.
+        receive: Receive the next sample.
+        samples: Yield samples until the connection closes.
+    """
+
+    def __init__(self, host, port=RTDE_PORT, timeout=4):
+        self.address = (host, port)
+        self.socket = socket.create_connection(self.address, timeout=timeout)
+        self.stream = self.socket.makefile("rb")
+        self.recipe = None
+        self.controller_version = None
+        self.text_messages = []
+
+    def send(self, package_type, payload=b""):
+        self.socket.sendall(struct.pack(">HB", len(payload) + 3, package_type) + payload)
+
+    def receive_package(self):
+        header = self.stream.read(3)
+        if len(header) < 3:
+            raise ConnectionError(f"Connection to {self.address[0]}:{self.address[1]} closed")
+        size, package_type = struct.unpack(">HB", header)
+        payload = self.stream.read(size - 3)
+        if len(payload) < size - 3:
+            raise ConnectionError(f"Connection to {self.address[0]}:{self.address[1]} closed")
+        return package_type, header + payload
+
+    def receive_reply(self, expected_type):
+        while True:
+            package_type, data = self.receive_package()
+            if package_type == expected_type:
+                return data[3:]
+            if package_type == RTDE_TEXT_MESSAGE:
+                self.text_messages.append(decode_text_message(data))
+
+    def negotiate_protocol_version(self, version=RTDE_PROTOCOL_VERSION) -> bool:
+        self.send(RTDE_REQUEST_PROTOCOL_VERSION, struct.pack(">H", version))
+        return struct.unpack(">B", self.receive_reply(RTDE_REQUEST_PROTOCOL_VERSION))[0] == 1
+
+    def get_controller_version(self):
+        self.send(RTDE_GET_URCONTROL_VERSION)
+        self.controller_version = struct.unpack(">IIII", self.receive_reply(RTDE_GET_URCONTROL_VERSION))
+        return self.controller_version
+
+    def setup_outputs(self, variables, frequency=125.0):
+        """
+        Negotiate an output recipe.
+
+        Args:
+            variables (list): RTDE output variable names, e.g. from `read_recipe`.
+            frequency (float): The requested number of samples per second.
+
+        Returns:
+            RTDERecipe: The compiled recipe.
+
+        Raises:
+            ValueError: If the controller does not know, or cannot share, a variable.
+        """
+        payload = struct.pack(">d", frequency) + ",".join(variables).encode()
+        self.send(RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS, payload)
+        reply = self.receive_reply(RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS)
+        recipe_id = reply[0]
+        types = reply[1:].decode().split(",")
+        self.recipe = RTDERecipe(recipe_id, variables, types)
+        return self.recipe
+
+    def start(self) -> bool:
+        self.send(RTDE_CONTROL_PACKAGE_START)
+        return struct.unpack(">B", self.receive_reply(RTDE_CONTROL_PACKAGE_START))[0] == 1
+
+    def pause(self) -> bool:
+        self.send(RTDE_CONTROL_PACKAGE_PAUSE)
+        return struct.unpack(">B", self.receive_reply(RTDE_CONTROL_PACKAGE_PAUSE))[0] == 1
+
+    def receive(self) -> dict:
+        """
+        Receive the next sample.
+
+        Returns:
+            dict: The receive time under `received_timestamp` followed by the recipe's values.
+        """
+        data = self.receive_reply(RTDE_DATA_PACKAGE)
+        row = {"received_timestamp": datetime.now()}
+        row.update(self.recipe.decode(data))
+        return row
+
+    def samples(self):
+        """
+        Yield samples until the connection closes.
+
+        Yields:
+            dict: One sample per data package.
+        """
+        while True:
+            try:
+                yield self.receive()
+            except ConnectionError:
+                return
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def decode_text_message(data):
+    position = 3
+    message_length = data[position]
+    message = data[position + 1:position + 1 + message_length].decode(errors="replace")
+    position += 1 + message_length
+    source_length = data[position]
+    source = data[position + 1:position + 1 + source_length].decode(errors="replace")
+    warning_level = data[position + 1 + source_length]
+    return (source, warning_level, message)
+
+
+class RTDEServer:
+    """
+    A local stand-in for the RTDE interface used for tests.
+
+    It negotiates protocol version 2, reports controller version 5.9.0.0, and accepts output
+    recipes built from `variables`. Once started, data packages are streamed at the recipe's
+    frequency: `timestamp` advances by the period, vectors hold sin(timestamp + element
+    index), and integers hold 7.
+
+    Attributes:
+        variables (dict): The output variables offered, mapped to their RTDE data types.
+        address (tuple): The (host, port) the server listens on once started.
+
+    Methods:
+        start: Start serving in a background thread.
+        stop: Stop serving and close the listening socket.
+    """
+
+    VARIABLES = {
+        "timestamp": "DOUBLE",
+        "actual_q": "VECTOR6D",
+        "actual_qd": "VECTOR6D",
+        "actual_current": "VECTOR6D",
+        "joint_temperatures": "VECTOR6D",
+        "actual_TCP_pose": "VECTOR6D",
+        "actual_TCP_speed": "VECTOR6D",
+        "robot_mode": "INT32",
+        "safety_mode": "INT32",
+        "runtime_state": "UINT32",
+        "speed_scaling": "DOUBLE",
+        "actual_digital_input_bits": "UINT64",
+        "actual_digital_output_bits": "UINT64"
+    }
+
+    def __init__(self, host="127.0.0.1", port=0, variables=None):
+        self.variables = dict(variables or self.VARIABLES)
+        self.address = (host, port)
+        self.server = None
+
+    def start(self):
+        stand_in = self
+
+        class RTDEHandler(socketserver.BaseRequestHandler):
+            def setup(self):
+                self.lock = threading.Lock()
+                self.streaming = threading.Event()
+                self.recipe = None
+                self.frequency = 125.0
+
+            def send(self, package_type, payload=b""):
+                with self.lock:
+                    self.request.sendall(struct.pack(">HB", len(payload) + 3, package_type) + payload)
+
+            def stream(self):
+                sample = 0
+                next_send = time.monotonic()
+                try:
+                    while self.streaming.is_set() and stand_in.server is not None:
+                        elapsed = sample / self.frequency
+                        values = []
+                        for variable in self.recipe:
+                            data_type = stand_in.variables[variable]
+                            if data_type == "DOUBLE":
+                                values.append(elapsed)
+                            elif data_type.startswith("VECTOR"):
+                                width = 3 if data_type == "VECTOR3D" else 6
+                                values.extend(math.sin(elapsed + element) for element in range(width))
+                            else:
+                                values.append(7)
+                        codes = "".join(RTDE_TYPE_CODES[stand_in.variables[variable]] for variable in self.recipe)
+                        self.send(RTDE_DATA_PACKAGE, struct.pack(f">B{codes}", 1, *values))
+                        sample += 1
+                        next_send += 1.0 / self.frequency
+                        delay = next_send - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                except OSError:
+                    return
+
+            def handle(self):
+                stream = self.request.makefile("rb")
+                try:
+                    while True:
+                        header = stream.read(3)
+                        if len(header) < 3:
+                            return
+                        size, package_type = struct.unpack(">HB", header)
+                        payload = stream.read(size - 3)
+                        self.reply(package_type, payload)
+                except OSError:
+                    return
+                finally:
+                    self.streaming.clear()
+
+            def reply(self, package_type, payload):
+                if package_type == RTDE_REQUEST_PROTOCOL_VERSION:
+                    accepted = struct.unpack(">H", payload)[0] == RTDE_PROTOCOL_VERSION
+                    self.send(package_type, struct.pack(">B", accepted))
+                elif package_type == RTDE_GET_URCONTROL_VERSION:
+                    self.send(package_type, struct.pack(">IIII", 5, 9, 0, 0))
+                elif package_type == RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS:
+                    self.frequency = struct.unpack_from(">d", payload)[0]
+                    variables = payload[8:].decode().split(",")
+                    types = [stand_in.variables.get(variable, "NOT_FOUND") for variable in variables]
+                    if "NOT_FOUND" not in types:
+                        self.recipe = variables
+                    self.send(package_type, struct.pack(">B", 1) + ",".join(types).encode())
+                elif package_type == RTDE_CONTROL_PACKAGE_START:
+                    accepted = self.recipe is not None and not self.streaming.is_set()
+                    self.send(package_type, struct.pack(">B", accepted))
+                    if accepted:
+                        self.streaming.set()
+                        threading.Thread(target=self.stream, daemon=True).start()
+                elif package_type == RTDE_CONTROL_PACKAGE_PAUSE:
+                    self.streaming.clear()
+                    self.send(package_type, struct.pack(">B", 1))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(self.address, RTDEHandler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        server, self.server = self.server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -57,7 +57,17 @@ class SubPackage:
             (16, 10): SafetyData,
             (16, 11): ToolCommunicationInfo,
             (16, 12): ToolModeInfo,
-            (16, 13): SingularityInfo
+            (16, 13): SingularityInfo,
+            (20, 0): TextMessage,
+            (20, 1): ProgramLabelMessage,
+            (20, 3): VersionMessage,
+            (20, 5): SafetyModeMessage,
+            (20, 6): ErrorCodeMessage,
+            (20, 7): KeyMessage,
+            (20, 9): RequestValueMessage,
+            (20, 10): RuntimeExceptionMessage,
+            (25, 0): GlobalVariablesSetupMessage,
+            (25, 1): GlobalVariablesUpdateMessage
         }
         subclass = subclasses.get((package_type, subpackage_type))
 
@@ -76,6 +86,15 @@ class SubPackage:
                 subpackage_type
             )
 
+    # Creates a subpackage from variables that are already decoded, e.g. by generated layout decoders.
+    @classmethod
+    def from_variables(cls, package_type, subpackage_data, subpackage_length, subpackage_type, subpackage_name, subpackage_variables):
+        subpackage = cls.__new__(cls)
+        SubPackage.__init__(subpackage, package_type, subpackage_data, subpackage_length, subpackage_type)
+        subpackage.subpackage_name = subpackage_name
+        subpackage.subpackage_variables = subpackage_variables
+        return subpackage
+
     def decode_subpackage_variables(self):
         unpacked_data = struct.unpack(
             self.format_string,
@@ -129,13 +148,18 @@ class RobotModeData(SubPackage):
 
 
 class JointData(SubPackage):
+    FlattenedJointData = None
+
     def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
         super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
         self.subpackage_name = "Joint Data"
         self.format_string = '>dddffffBdddffffBdddffffBdddffffBdddffffBdddffffB'
         self.Structure = JointDataStructure
-        field_names = [f'Joint{i+1}_{field}' for i in range(6) for field in JointDataStructure._fields]
-        self.FlattenedJointData = namedtuple('FlattenedJointData', field_names)
+
+        # Creating a named tuple class is expensive; therefore, create it once per class.
+        if JointData.FlattenedJointData is None:
+            field_names = [f'Joint{i+1}_{field}' for i in range(6) for field in JointDataStructure._fields]
+            JointData.FlattenedJointData = namedtuple('FlattenedJointData', field_names)
         self.subpackage_variables = self.decode_subpackage_variables()
 
     def decode_subpackage_variables(self):
@@ -221,7 +245,7 @@ class MasterBoardData(SubPackage):
             format_string = '>IBBB'
             unpacked_data += struct.unpack(format_string, self.subpackage_data[68:])
         else:
-            format_string = '>IIFFIBBB'
+            format_string = '>IIffIBBB'
             unpacked_data += struct.unpack(format_string, self.subpackage_data[68:])
 
         subpackage_variables = MasterboardDataStructure._make(unpacked_data)
@@ -291,13 +315,19 @@ class SingularityInfo(SubPackage):
 
 
 class ConfigurationData(SubPackage):
+    FlattenedStructure = None
+
     def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
         super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
         self.subpackage_name = "Configuration Data"
         self.format_string = ">dddddddddddddddddddddddddddddddddddddddddddddddddddddiiii"
         self.Structure = ConfigurationDataStructure
-        field_names = self.create_flattened_fields()
-        self.Structure = namedtuple('FlattenedConfigurationData', field_names)
+
+        # Creating a named tuple class is expensive; therefore, create it once per class.
+        if ConfigurationData.FlattenedStructure is None:
+            field_names = self.create_flattened_fields()
+            ConfigurationData.FlattenedStructure = namedtuple('FlattenedConfigurationData', field_names)
+        self.Structure = ConfigurationData.FlattenedStructure
         self.subpackage_variables = self.decode_subpackage_variables()
     
     def create_flattened_fields(self):
@@ -334,6 +364,9 @@ class ConfigurationData(SubPackage):
 
 
 class KinematicsInfo(SubPackage):
+    SingleStructure = None
+    FlattenedStructure = None
+
     def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
         super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
         self.subpackage_name = "Kinematics Info"
@@ -347,12 +380,17 @@ class KinematicsInfo(SubPackage):
         self.Structure = KinematicsInfoStructure
 
 
+        # Creating a named tuple class is expensive; therefore, create each once per class.
         if self.subpackage_length == 9: # Controller sends no joint info
-            self.Structure = namedtuple("KinematicsInfoStructureSingle", ["calibration_status"])
+            if KinematicsInfo.SingleStructure is None:
+                KinematicsInfo.SingleStructure = namedtuple("KinematicsInfoStructureSingle", ["calibration_status"])
+            self.Structure = KinematicsInfo.SingleStructure
             self.subpackage_variables = self.decode_subpackage_variables()
         else: # Controller sends joint info
-            field_names = self.create_flattened_fields()
-            self.Structure = namedtuple('FlattenedKinematicsInfo', field_names)
+            if KinematicsInfo.FlattenedStructure is None:
+                field_names = self.create_flattened_fields()
+                KinematicsInfo.FlattenedStructure = namedtuple('FlattenedKinematicsInfo', field_names)
+            self.Structure = KinematicsInfo.FlattenedStructure
             self.subpackage_variables = self.decode_subpackage_variables()
 
     def create_flattened_fields(self):
@@ -387,6 +425,151 @@ class KinematicsInfo(SubPackage):
 
 
 
+class RobotMessage(SubPackage):
+    # Robot messages, package type 20, are not divided into subpackages. The whole message is
+    # decoded as one; the robot message type takes the place of the subpackage type.
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.header_format = '>QbB'
+        self.has_text = True
+
+    def decode_subpackage_variables(self):
+        header_size = struct.calcsize(self.header_format)
+        header = struct.unpack(self.header_format, self.subpackage_data[5:5+header_size])
+        body = bytes(self.subpackage_data[5+header_size:self.subpackage_length])
+
+        # Timestamp is converted the same way as the Robot Mode Data timestamp.
+        header = (timedelta(seconds=header[0]/1000000),) + header[1:]
+        subpackage_variables = self.Structure._make(header + self.decode_message_body(body))
+
+        return subpackage_variables
+
+    def decode_message_body(self, body):
+        # Fixed size values come first; any text fills the remainder of the message.
+        fixed_size = struct.calcsize(self.format_string)
+        unpacked_data = struct.unpack(self.format_string, body[:fixed_size])
+        if self.has_text:
+            unpacked_data += (body[fixed_size:].decode(errors="replace"),)
+        return unpacked_data
+
+
+class TextMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Text Message"
+        self.format_string = '>'
+        self.Structure = TextMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class ProgramLabelMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Program Label Message"
+        self.format_string = '>i'
+        self.Structure = ProgramLabelMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class VersionMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Version Message"
+        self.Structure = VersionMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+    # Override necessary for the variable length project name.
+    def decode_message_body(self, body):
+        project_name_size = struct.unpack('>b', body[0:1])[0]
+        project_name = body[1:1+project_name_size].decode(errors="replace")
+        position = 1 + project_name_size
+        versions = struct.unpack('>BBii', body[position:position+10])
+        build_date = body[position+10:].decode(errors="replace")
+        return (project_name,) + versions + (build_date,)
+
+
+class SafetyModeMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Safety Mode Message"
+        self.format_string = '>iiBII'
+        self.has_text = False
+        self.Structure = SafetyModeMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class ErrorCodeMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Error Code Message"
+        self.format_string = '>iiiBI'
+        self.Structure = ErrorCodeMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class KeyMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Key Message"
+        self.Structure = KeyMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+    # Override necessary for the variable length title.
+    def decode_message_body(self, body):
+        code, argument, title_size = struct.unpack('>iiB', body[0:9])
+        title = body[9:9+title_size].decode(errors="replace")
+        text = body[9+title_size:].decode(errors="replace")
+        return (code, argument, title, text)
+
+
+class RequestValueMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Request Value Message"
+        self.format_string = '>IB'
+        self.Structure = RequestValueMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class RuntimeExceptionMessage(RobotMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Runtime Exception Message"
+        self.format_string = '>ii'
+        self.Structure = RuntimeExceptionMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class ProgramStateMessage(RobotMessage):
+    # Program state messages, package type 25, have no source in their header.
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.header_format = '>QB'
+
+
+class GlobalVariablesSetupMessage(ProgramStateMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Global Variables Setup Message"
+        self.format_string = '>H'
+        self.Structure = GlobalVariablesSetupMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+
+class GlobalVariablesUpdateMessage(ProgramStateMessage):
+    def __init__(self, package_type, subpackage_data, subpackage_length, subpackage_type):
+        super().__init__(package_type, subpackage_data, subpackage_length, subpackage_type)
+        self.subpackage_name = "Global Variables Update Message"
+        self.format_string = '>H'
+        self.Structure = GlobalVariablesUpdateMessageStructure
+        self.subpackage_variables = self.decode_subpackage_variables()
+
+    # Override necessary because the values are typed binary data; they are kept as hex.
+    def decode_message_body(self, body):
+        start_index = struct.unpack('>H', body[0:2])[0]
+        return (start_index, body[2:].hex())
+
+
 # Fallback mechanism / graceful degradation
 # Implemented to preserve robustness and handle unexpected subpackages
 class UnknownSubPackage(SubPackage):
@@ -562,3 +745,95 @@ JointDataStructure = namedtuple("JointDataStructure", [
     "T_micro",
     "jointMode"
 ])
+
+TextMessageStructure = namedtuple("TextMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "textMessage"
+])
+
+ProgramLabelMessageStructure = namedtuple("ProgramLabelMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "id",
+    "textMessage"
+])
+
+VersionMessageStructure = namedtuple("VersionMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "projectName",
+    "majorVersion",
+    "minorVersion",
+    "bugfixVersion",
+    "buildNumber",
+    "buildDate"
+])
+
+SafetyModeMessageStructure = namedtuple("SafetyModeMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "robotMessageCode",
+    "robotMessageArgument",
+    "safetyModeType",
+    "reportDataType",
+    "reportData"
+])
+
+ErrorCodeMessageStructure = namedtuple("ErrorCodeMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "robotMessageCode",
+    "robotMessageArgument",
+    "robotMessageReportLevel",
+    "robotMessageDataType",
+    "robotMessageData",
+    "robotCommTextMessage"
+])
+
+KeyMessageStructure = namedtuple("KeyMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "robotMessageCode",
+    "robotMessageArgument",
+    "messageTitle",
+    "keyTextMessage"
+])
+
+RequestValueMessageStructure = namedtuple("RequestValueMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "requestId",
+    "requestedType",
+    "requestTextMessage"
+])
+
+RuntimeExceptionMessageStructure = namedtuple("RuntimeExceptionMessageStructure", [
+    "timestamp",
+    "source",
+    "robotMessageType",
+    "scriptLineNumber",
+    "scriptColumnNumber",
+    "runtimeExceptionTextMessage"
+])
+
+GlobalVariablesSetupMessageStructure = namedtuple("GlobalVariablesSetupMessageStructure", [
+    "timestamp",
+    "programStateMessageType",
+    "startIndex",
+    "variableNames"
+])
+
+GlobalVariablesUpdateMessageStructure = namedtuple("GlobalVariablesUpdateMessageStructure", [
+    "timestamp",
+    "programStateMessageType",
+    "startIndex",
+    "variableValues"
+])
\ No newline at end of file
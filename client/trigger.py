@@ -0,0 +1,298 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import ast
+import os
+import re
+import time
+from collections import deque
+from tabulate import tabulate
+from package import resolve_field_name
+from memory import frame_usage
+
+def sanitize_file_name(name) -> str:
+    """
+    Replace every character other than letters, digits, `_`, `-` and `.` so a rule name is
+    safe to use in a file name.
+    """
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", name).strip(".")
+    return name or "rule"
+
+
+class TriggerRule:
+    """
+    A named condition over flattened variable names, e.g. `Joint3_T_motor > 60`.
+
+    The expression is parsed when the rule is created and compiled into a Python function
+    the first time a package containing every referenced variable arrives. Expressions may
+    use comparisons, arithmetic, `and`, `or`, `not` and `abs()`.
+
+    Attributes:
+        name (str): The rule name used in capture file names and reports.
+        expression (str): The condition source.
+        post_trigger_frames (int): The number of frames captured after the rule fires.
+        evaluations (int): The number of times the rule has been evaluated.
+        fired (int): The number of times the rule has fired.
+        total_ns (int): The total evaluation time in nanoseconds.
+
+    Methods:
+        compile: Compile the expression against the variables of a package.
+        evaluate: Evaluate the rule against a package's flattened variables.
+    """
+
+    ALLOWED_NODES = (
+        ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+        ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Compare, ast.Eq, ast.NotEq,
+        ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Name, ast.Load, ast.Constant, ast.Call
+    )
+
+    def __init__(self, name, expression, post_trigger_frames=10):
+        self.name = name
+        self.expression = expression
+        self.post_trigger_frames = post_trigger_frames
+        self.evaluations = 0
+        self.fired = 0
+        self.total_ns = 0
+        self.predicate = None
+        self.armed = True
+        self.tree = self.parse_expression(expression)
+
+    def parse_expression(self, expression):
+        tree = ast.parse(expression, mode="eval")
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax in rule {self.name}: {type(node).__name__}")
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id == "abs"):
+                raise ValueError(f"Unsupported call in rule {self.name}; only abs() is allowed")
+        return tree
+
+    def compile(self, flattened_names) -> bool:
+        """
+        Compile the expression into a predicate over a dictionary of flattened variables.
+
+        Variable names are resolved to flattened names once, here, so evaluation is a plain
+        function call with dictionary lookups.
+
+        Args:
+            flattened_names (iterable): The flattened names available in a package.
+
+        Returns:
+            bool: True if compiled, False if a referenced variable is not present yet.
+
+        Raises:
+            KeyError: If a referenced variable name is ambiguous.
+        """
+        flattened_names = list(flattened_names)
+        names = {node.id for node in ast.walk(self.tree) if isinstance(node, ast.Name) and node.id != "abs"}
+        resolved = {}
+        for name in names:
+            try:
+                resolved[name] = resolve_field_name(name, flattened_names)
+            except KeyError:
+                if any(flattened_name.endswith(f"_{name}") for flattened_name in flattened_names):
+                    raise
+                return False
+
+        # Rewrites every variable as a lookup in the argument `v` and wraps it in a lambda.
+        class VariableLookup(ast.NodeTransformer):
+            def visit_Name(self, node):
+                if node.id not in resolved:
+                    return node
+                return ast.copy_location(
+                    ast.Subscript(value=ast.Name(id="v", ctx=ast.Load()), slice=ast.Constant(resolved[node.id]), ctx=ast.Load()),
+                    node
+                )
+
+        body = VariableLookup().visit(ast.parse(self.expression, mode="eval")).body
+        arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg="v")], kwonlyargs=[], kw_defaults=[], defaults=[])
+        function = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=arguments, body=body)))
+        self.predicate = eval(compile(function, f"<rule {self.name}>", "eval"), {"__builtins__": {}, "abs": abs})
+        return True
+
+    def evaluate(self, flattened) -> bool:
+        """
+        Evaluate the rule and report whether it fired.
+
+        A rule fires when its condition becomes true and re-arms once the condition is false
+        again, so a condition that stays true fires only once.
+
+        Args:
+            flattened (dict): A package's flattened variables.
+
+        Returns:
+            bool: True if the rule fired.
+        """
+        if self.predicate is None and not self.compile(flattened):
+            return False
+
+        start = time.perf_counter_ns()
+        try:
+            condition = bool(self.predicate(flattened))
+        except (KeyError, TypeError, ZeroDivisionError):
+            condition = False
+
+        self.evaluations += 1
+        self.total_ns += time.perf_counter_ns() - start
+
+        if condition and self.armed:
+            self.armed = False
+            self.fired += 1
+            return True
+        if not condition:
+            self.armed = True
+        return False
+
+
+class TriggerEngine:
+    """
+    A rule engine capturing raw frames around events.
+
+    Every package's raw frame enters a bounded pre-trigger ring. When a rule fires, the ring
+    and the next `post_trigger_frames` frames are written to a capture file named after the
+    rule and the time it fired. Capture files hold the frames exactly as received, one after
+    the other, so they can be read back like any other capture.
+
+    Attributes:
+        rules (list): The TriggerRule objects evaluated for every robot state package.
+        pre_trigger_frames (int): The number of frames kept ahead of a trigger.
+        output_directory (str): The directory capture files are written to.
+        captures (list): The paths of completed capture files.
+        flattenings (int): The number of packages whose variables were flattened for the rules.
+        flatten_ns (int): The total time spent flattening variables, in nanoseconds. This cost
+                          is shared by every rule and is not part of the per-rule timings.
+
+    Methods:
+        process: Evaluate every rule against a package and advance pending captures.
+        close: Write pending captures with the frames received so far.
+        report: Generate a table of rule evaluation costs and firing counts.
+        memory_usage: Report the bytes held by the pre-trigger ring and pending captures.
+    """
+
+    def __init__(self, rules, pre_trigger_frames=50, output_directory=os.path.join("output", "triggers")):
+        self.rules = list(rules)
+        self.pre_trigger_frames = pre_trigger_frames
+        self.output_directory = output_directory
+        self.captures = []
+        self.pre_trigger_ring = deque(maxlen=pre_trigger_frames)
+        self.pending_captures = []
+        self.flattenings = 0
+        self.flatten_ns = 0
+
+    def process(self, package) -> list:
+        """
+        Evaluate every rule against a package and advance pending captures.
+
+        Args:
+            package (Package): A decoded package.
+
+        Returns:
+            list: The rules that fired on this package.
+        """
+        frame = bytes(package.robot_data)
+
+        # Frames following earlier triggers complete their captures.
+        for capture in self.pending_captures:
+            capture["frames"].append(frame)
+            capture["remaining"] -= 1
+        self.flush_completed_captures()
+
+        fired_rules = []
+        if package.type == 16 and package.subpackage_list:
+            start = time.perf_counter_ns()
+            flattened = package.get_flattened_variables()
+            self.flatten_ns += time.perf_counter_ns() - start
+            self.flattenings += 1
+            fired_rules = [rule for rule in self.rules if rule.evaluate(flattened)]
+
+        for rule in fired_rules:
+            capture = {
+                "rule": rule,
+                "time": package.received_timestamp,
+                "frames": list(self.pre_trigger_ring) + [frame],
+                "remaining": rule.post_trigger_frames
+            }
+            self.pending_captures.append(capture)
+        self.flush_completed_captures()
+
+        self.pre_trigger_ring.append(frame)
+        return fired_rules
+
+    def flush_completed_captures(self):
+        completed = [capture for capture in self.pending_captures if capture["remaining"] <= 0]
+        if not completed:
+            return
+
+        if not os.path.exists(self.output_directory):
+            os.makedirs(self.output_directory)
+
+        for capture in completed:
+            formatted = capture["time"].strftime("%Y%m%d_%H%M%S_%f")
+            file_path = os.path.join(self.output_directory, f"{sanitize_file_name(capture['rule'].name)}_{formatted}.bin")
+            with open(file_path, "wb") as file:
+                for frame in capture["frames"]:
+                    file.write(frame)
+            self.captures.append(file_path)
+            self.pending_captures.remove(capture)
+
+    def close(self):
+        """
+        Write pending captures with the frames received so far, e.g. before the program exits.
+        """
+        for capture in self.pending_captures:
+            capture["remaining"] = 0
+        self.flush_completed_captures()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def memory_usage(self) -> list:
+        pending_frames = [frame for capture in self.pending_captures for frame in capture["frames"]]
+        return frame_usage("pre_trigger_ring", self.pre_trigger_ring) + frame_usage("pending_captures", pending_frames)
+
+    def report(self) -> str:
+        """
+        Generate a table of rule evaluation costs and firing counts.
+
+        Returns:
+            str: A formatted table with one row per rule.
+        """
+        rows = []
+        for rule in self.rules:
+            mean_us = rule.total_ns / rule.evaluations / 1000 if rule.evaluations else 0.0
+            rows.append([rule.name, rule.expression, rule.evaluations, rule.fired, f"{mean_us:.2f}", f"{rule.total_ns / 1e6:.3f}"])
+        table = tabulate(rows, headers=["Rule", "Expression", "Evaluations", "Fired", "Mean (us)", "Total (ms)"], tablefmt="grid")
+
+        # Flattening is paid once per package, ahead of every rule.
+        mean_us = self.flatten_ns / self.flattenings / 1000 if self.flattenings else 0.0
+        return f"{table}\nFLATTENING: {self.flattenings} packages, {mean_us:.2f} us mean, {self.flatten_ns / 1e6:.3f} ms total\n"
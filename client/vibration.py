@@ -0,0 +1,236 @@
+'''
+BSD 3-Clause License
+
+Copyright (c) 2023, Shawn Armstrong
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright notice, this
+   list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright notice,
+   this list of conditions and the following disclaimer in the documentation
+   and/or other materials provided with the distribution.
+
+3. Neither the name of the copyright holder nor the names of its
+   contributors may be used to endorse or promote products derived from
+   this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''
+
+import numpy as np
+from collections import namedtuple
+from numpy.lib.stride_tricks import sliding_window_view
+from memory import MemoryUsage
+
+# Joint Data variables analyzed, each for all six joints.
+VIBRATION_SIGNALS = ("I_actual", "qd_actual", "T_motor")
+
+# Frequency bands in Hz, as [low, high) ranges, covering the primary interface's 10 Hz rate.
+DEFAULT_BANDS = ((0.0, 0.5), (0.5, 1.5), (1.5, 3.0), (3.0, 5.01))
+
+JOINTS = 6
+
+class BandEnergy:
+    """
+    Computes band energies of windowed signals with one batched real FFT.
+
+    Each window has its mean removed and is tapered with a Hann window before the FFT. Band
+    energies are the windowed signal's mean square within each band, so a sinusoid of
+    amplitude A contributes A**2 / 2 to the band holding its frequency.
+
+    Attributes:
+        window (int): The number of samples per window.
+        sample_rate (float): The sampling rate in Hz.
+        bands (tuple): The (low, high) band edges in Hz.
+    """
+
+    def __init__(self, window, sample_rate, bands=DEFAULT_BANDS):
+        self.window = window
+        self.sample_rate = sample_rate
+        self.bands = tuple(bands)
+
+        self.taper = np.hanning(window)
+        frequencies = np.fft.rfftfreq(window, 1 / sample_rate)
+        self.band_matrix = np.array([(frequencies >= low) & (frequencies < high) for low, high in self.bands], dtype=float).T
+
+        # One-sided spectrum: every bin except DC and Nyquist stands for two.
+        weights = np.full(len(frequencies), 2.0)
+        weights[0] = 1.0
+        if window % 2 == 0:
+            weights[-1] = 1.0
+        self.bin_weights = weights / (window * np.sum(self.taper ** 2))
+
+    def __call__(self, frames) -> np.ndarray:
+        """
+        Compute the band energies of windows along the last axis.
+
+        Args:
+            frames (numpy.ndarray): Windows of shape (..., window).
+
+        Returns:
+            numpy.ndarray: Band energies of shape (..., bands).
+        """
+        centered = frames - frames.mean(axis=-1, keepdims=True)
+        spectra = np.fft.rfft(centered * self.taper, axis=-1)
+        power = (spectra.real ** 2 + spectra.imag ** 2) * self.bin_weights
+        return power @ self.band_matrix
+
+
+class SpectralAnalyzer:
+    """
+    Streams band-energy features of joint currents, speeds and temperatures.
+
+    The latest `window` samples of every joint signal are kept in one preallocated float64
+    array. Every sample is written twice, at `slot` and `slot + window`, so the current window
+    of every channel is always a contiguous view. Every `hop` samples, overlapping windows of
+    all channels go through a single batched FFT and one VibrationFeatures is emitted. Memory
+    is fixed per robot and no raw history is kept, so one analyzer per robot scales to a fleet.
+
+    Attributes:
+        window (int): The number of samples per FFT window.
+        hop (int): The number of samples between features.
+        sample_rate (float): The rate of robot state messages in Hz.
+        signals (tuple): The Joint Data variables analyzed.
+        count (int): The number of samples appended.
+        features (int): The number of features emitted.
+
+    Methods:
+        append: Add one sample of every channel and emit features on the hop cadence.
+        process: Add the Joint Data of a robot state package.
+        feature_row: Flatten features into a dictionary for the pipeline's sinks.
+        memory_usage: Report the bytes held for a MemoryAccountant.
+    """
+
+    def __init__(self, window=64, hop=16, sample_rate=10.0, bands=DEFAULT_BANDS, signals=VIBRATION_SIGNALS):
+        if not 0 < hop <= window:
+            raise ValueError(f"hop must be between 1 and the window size {window}, got {hop}")
+        self.window = window
+        self.hop = hop
+        self.sample_rate = sample_rate
+        self.signals = tuple(signals)
+        self.band_energy = BandEnergy(window, sample_rate, bands)
+        self.count = 0
+        self.features = 0
+
+        self.fields = [f"Joint{joint+1}_{signal}" for signal in self.signals for joint in range(JOINTS)]
+        self._data = np.zeros((len(self.fields), 2 * window))
+
+    def append(self, values, timestamp=None):
+        """
+        Add one sample of every channel and emit features on the hop cadence.
+
+        Args:
+            values (array_like): One value per channel, in the order of `signals` then joints.
+            timestamp (float): The controller timestamp of the sample in seconds.
+
+        Returns:
+            VibrationFeatures: The features of the window ending with this sample, or None
+                               between hops and until the first window is full.
+        """
+        slot = self.count % self.window
+        self._data[:, slot] = values
+        self._data[:, slot + self.window] = values
+        self.count += 1
+
+        if self.count < self.window or (self.count - self.window) % self.hop:
+            return None
+
+        start = self.count % self.window
+        energies = self.band_energy(self._data[:, start:start + self.window])
+        self.features += 1
+        return VibrationFeatures(timestamp, energies.reshape(len(self.signals), JOINTS, -1))
+
+    def process(self, package):
+        """
+        Add the Joint Data of a robot state package.
+
+        Args:
+            package (Package): A decoded package; packages without Joint Data are ignored.
+
+        Returns:
+            VibrationFeatures: As returned by `append`.
+        """
+        if package.type != 16:
+            return None
+        joint_data = package.get_subpackage("Joint Data")
+        if joint_data is None:
+            return None
+
+        variables = joint_data.subpackage_variables
+        values = [getattr(variables, field) for field in self.fields]
+
+        robot_mode_data = package.get_subpackage("Robot Mode Data")
+        timestamp = robot_mode_data.subpackage_variables.timestamp.total_seconds() if robot_mode_data else None
+        return self.append(values, timestamp)
+
+    def feature_row(self, features) -> dict:
+        """
+        Flatten features into a dictionary, e.g. `Joint2_I_actual_band1`, for the pipeline's sinks.
+        """
+        row = {"controller_timestamp": features.timestamp}
+        for field, energies in zip(self.fields, features.energies.reshape(len(self.fields), -1)):
+            for band, energy in enumerate(energies):
+                row[f"{field}_band{band}"] = float(energy)
+        return row
+
+    def memory_usage(self) -> list:
+        return [MemoryUsage(None, "vibration", 16, min(self.count, self.window), self._data.nbytes)]
+
+
+def vibration_features(packages, analyzer=None):
+    """
+    Reduce a package stream to band-energy features; usable as a pipeline stage.
+
+    Args:
+        packages (iterable): Decoded packages.
+        analyzer (SpectralAnalyzer): The analyzer to use; a default one when not given.
+
+    Yields:
+        dict: One row per hop, as produced by `SpectralAnalyzer.feature_row`.
+    """
+    analyzer = analyzer or SpectralAnalyzer()
+    for package in packages:
+        features = analyzer.process(package)
+        if features is not None:
+            yield analyzer.feature_row(features)
+
+
+def band_energies(values, window=64, hop=16, sample_rate=10.0, bands=DEFAULT_BANDS) -> np.ndarray:
+    """
+    Compute band energies over a recorded signal offline, matching `SpectralAnalyzer`.
+
+    Windows are strided views of the recording, so no window is copied before the FFT.
+
+    Args:
+        values (array_like): Samples of shape (samples,) or (samples, channels), e.g. a
+                             `RingHistory` query.
+        window (int): The number of samples per FFT window.
+        hop (int): The number of samples between windows.
+        sample_rate (float): The sampling rate in Hz.
+        bands (tuple): The (low, high) band edges in Hz.
+
+    Returns:
+        numpy.ndarray: Band energies of shape (windows, bands) or (windows, channels, bands).
+    """
+    values = np.asarray(values, dtype=float)
+    frames = sliding_window_view(values, window, axis=0)[::hop]
+    return BandEnergy(window, sample_rate, bands)(frames)
+
+
+########################### NAMED TUPLES ###########################
+VibrationFeatures = namedtuple("VibrationFeatures", [
+    "timestamp",
+    "energies"
+])
@@ -6,5 +6,6 @@ setup(
     packages=find_packages(),
     install_requires=[
         "tabulate",
+        "numpy",
     ],
 )
\ No newline at end of file
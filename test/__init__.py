@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules within `client` import each other as top-level modules because client.py runs as a script.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "client"))
@@ -0,0 +1,49 @@
+# messages.py
+# Builds serialized primary interface messages for unit tests.
+
+import struct
+
+def create_subpackage_data(format_string, subpackage_type, values):
+
+    # Encodes subpackage length and subpackage type ahead of the values
+    data = struct.pack(format_string, *values)
+    return struct.pack('>IB', len(data) + 5, subpackage_type) + data
+
+def create_robot_mode_data(timestamp=0, is_protective_stopped=False, speed_scaling=1.0):
+    values = (timestamp, True, True, True, False, is_protective_stopped, True, False, 7, 0, 1.0, speed_scaling, 1.0, 0)
+    return create_subpackage_data('>Q????????BdddB', 0, values)
+
+def create_joint_data(q_actual=(0.0,) * 6, I_actual=(0.0,) * 6, V_actual=(48.0,) * 6, T_motor=(30.0,) * 6):
+    values = ()
+    for i in range(6):
+        values += (q_actual[i], q_actual[i], 0.0, I_actual[i], V_actual[i], T_motor[i], 35.0, 253)
+    return create_subpackage_data('>' + 'dddffffB' * 6, 1, values)
+
+def create_cartesian_info(pose=(0.0,) * 6, tcp_offset=(0.0,) * 6):
+    return create_subpackage_data('>dddddddddddd', 4, tuple(pose) + tuple(tcp_offset))
+
+def create_master_board_data(digital_input_bits=0, digital_output_bits=0, euromap_installed=False):
+    values = (digital_input_bits, digital_output_bits, 0, 0, 0.5, 0.25, 0, 0, 0.0, 0.0, 35.0, 48.0, 1.5, 0.1, 1, 0, int(euromap_installed))
+    if euromap_installed:
+        return create_subpackage_data('>IIBBddBBddffffBBBIIffIBBB', 3, values + (0, 0, 24.0, 0.5, 0, 1, 0, 0))
+    return create_subpackage_data('>IIBBddBBddffffBBBIBBB', 3, values + (0, 1, 0, 0))
+
+def create_robot_state_message(*subpackages):
+
+    # Encodes package length and package type 16 ahead of the subpackages
+    data = b''.join(subpackages)
+    return struct.pack('>IB', len(data) + 5, 16) + data
+
+def create_robot_message(robot_message_type, body, timestamp=0, source=-2):
+
+    # Encodes package length, package type 20, timestamp, source and message type ahead of the body
+    data = struct.pack('>QbB', timestamp, source, robot_message_type) + body
+    return struct.pack('>IB', len(data) + 5, 20) + data
+
+def create_key_message(title, text, code=0, argument=0, timestamp=0):
+    body = struct.pack('>iiB', code, argument, len(title)) + title.encode() + text.encode()
+    return create_robot_message(7, body, timestamp)
+
+def create_error_code_message(code, argument=0, report_level=2, text="", timestamp=0):
+    body = struct.pack('>iiiBI', code, argument, report_level, 0, 0) + text.encode()
+    return create_robot_message(6, body, timestamp)
@@ -0,0 +1,87 @@
+# test_bulk_decode.py
+
+import csv
+import os
+import tempfile
+import unittest
+from client.bulk_decode import bulk_decode
+from client.package import Package
+from test.messages import *
+
+class TestBulkDecode(unittest.TestCase):
+
+    FIELDS = ["X", "speedScaling", "Joint1_q_actual"]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_capture(self, name, first_timestamp, count, restart=None):
+        # Robot messages between the robot state messages are skipped by the decoder.
+        messages = []
+        for i in range(count):
+            timestamp = first_timestamp + i * 200000
+            if restart is not None and i >= restart:
+                timestamp -= restart * 200000 - 50000
+            messages.append(create_robot_state_message(
+                create_robot_mode_data(timestamp=timestamp, speed_scaling=i / count),
+                create_joint_data(q_actual=(i * 0.01,) * 6),
+                create_cartesian_info(pose=(i * 0.1, 0.0, 0.0, 0.0, 0.0, 0.0))
+            ))
+            if i % 5 == 0:
+                messages.append(create_key_message("PROGRAM_XXX_STARTED", "test", timestamp=timestamp))
+
+        file_path = os.path.join(self.directory.name, name)
+        with open(file_path, "wb") as file:
+            file.write(b''.join(messages))
+        return file_path, messages
+
+    def expected_rows(self, file_path, messages):
+        rows = []
+        for message in messages:
+            package = Package(message)
+            if package.type != 16:
+                continue
+            flattened = package.get_flattened_variables()
+            rows.append([flattened["Robot_Mode_Data_timestamp"].total_seconds(), file_path,
+                         flattened["Cartesian_Info_X"], flattened["Robot_Mode_Data_speedScaling"],
+                         flattened["Joint_Data_Joint1_q_actual"]])
+        return rows
+
+    def read_output(self, output_path):
+        with open(output_path, newline="") as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            rows = [[float(row[0]), row[1]] + [float(value) for value in row[2:]] for row in reader]
+        return header, rows
+
+    def test_matches_package_decode(self):
+        first_path, first_messages = self.write_capture("left.bin", 0, 40)
+        second_path, second_messages = self.write_capture("right.bin", 100000, 30)
+        expected = sorted(self.expected_rows(first_path, first_messages) + self.expected_rows(second_path, second_messages))
+
+        for jobs, chunk_size in ((1, 1 << 20), (2, 1000)):
+            output_path = os.path.join(self.directory.name, f"output_{jobs}.csv")
+            count = bulk_decode([first_path, second_path], output_path, self.FIELDS, jobs, chunk_size)
+
+            header, rows = self.read_output(output_path)
+            self.assertEqual(header, ["controller_timestamp", "source"] + self.FIELDS)
+            self.assertEqual(count, 70)
+            self.assertEqual(rows, expected)
+
+    def test_controller_restart(self):
+        file_path, messages = self.write_capture("restart.bin", 0, 30, restart=20)
+        expected = sorted(self.expected_rows(file_path, messages))
+
+        for chunk_size in (1 << 20, 1000):
+            output_path = os.path.join(self.directory.name, f"restart_{chunk_size}.csv")
+            count = bulk_decode([file_path], output_path, self.FIELDS, 1, chunk_size)
+
+            self.assertEqual(count, 30)
+            self.assertEqual(self.read_output(output_path)[1], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# test_decode_cache.py
+
+import unittest
+from client.decode_cache import DecodeCache
+from client.package import Package
+from test.messages import *
+
+class TestDecodeCache(unittest.TestCase):
+
+    def create_message(self, timestamp, digital_input_bits=0):
+        return create_robot_state_message(
+            create_robot_mode_data(timestamp=timestamp),
+            create_master_board_data(digital_input_bits=digital_input_bits)
+        )
+
+    def test_unchanged_subpackage_is_shared(self):
+        decode_cache = DecodeCache()
+        first = Package(self.create_message(0), decode_cache)
+        second = Package(self.create_message(100000), decode_cache)
+
+        self.assertIs(first.get_subpackage("Master Board Data"), second.get_subpackage("Master Board Data"))
+        self.assertIsNot(first.get_subpackage("Robot Mode Data"), second.get_subpackage("Robot Mode Data"))
+        self.assertEqual((decode_cache.hits, decode_cache.misses), (1, 1))
+        self.assertEqual(decode_cache.hit_rate(), 0.5)
+
+    def test_changed_subpackage_is_decoded(self):
+        decode_cache = DecodeCache()
+        Package(self.create_message(0, digital_input_bits=1), decode_cache)
+        package = Package(self.create_message(0, digital_input_bits=2), decode_cache)
+
+        self.assertEqual(package.get_subpackage("Master Board Data").subpackage_variables.digitalInputBits, 2)
+        self.assertEqual((decode_cache.hits, decode_cache.misses), (0, 2))
+
+    def test_least_recently_used_eviction(self):
+        decode_cache = DecodeCache(maxsize=2)
+        for bits in (1, 2, 1, 3):
+            Package(self.create_message(0, digital_input_bits=bits), decode_cache)
+
+        # 1 was used after 2, so 2 was evicted when 3 arrived
+        self.assertEqual(len(decode_cache), 2)
+        Package(self.create_message(0, digital_input_bits=1), decode_cache)
+        self.assertEqual(decode_cache.hits, 2)
+        Package(self.create_message(0, digital_input_bits=2), decode_cache)
+        self.assertEqual(decode_cache.hits, 2)
+        self.assertEqual(decode_cache.misses, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
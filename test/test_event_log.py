@@ -0,0 +1,73 @@
+# test_event_log.py
+
+import shutil
+import tempfile
+import unittest
+from client.event_log import EventLog
+from client.package import Package
+from test.messages import *
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_decode_error_code_message(self):
+        package = Package(create_error_code_message(204, 3, text="Joint 3 fault"))
+
+        message = package.get_subpackage("Error Code Message")
+        self.assertEqual(message.subpackage_variables.robotMessageCode, 204)
+        self.assertEqual(message.subpackage_variables.robotMessageArgument, 3)
+        self.assertEqual(message.subpackage_variables.robotCommTextMessage, "Joint 3 fault")
+
+    def test_query_by_code_and_run(self):
+        messages = [
+            create_error_code_message(100),
+            create_key_message("PROGRAM_XXX_STARTED", "pick_and_place"),
+            create_error_code_message(204, 3),
+            create_key_message("PROGRAM_XXX_STOPPED", "pick_and_place"),
+            create_error_code_message(204, 1),
+            create_key_message("PROGRAM_XXX_STARTED", "palletizing")
+        ]
+        with EventLog(self.directory) as event_log:
+            for message in messages:
+                self.assertTrue(event_log.append(Package(message)))
+
+            errors = event_log.events(code="C204")
+            self.assertEqual([event["robotMessageArgument"] for event in errors], [3, 1])
+            self.assertEqual([event["robotMessageArgument"] for event in event_log.events(code="C204A3")], [3])
+
+            runs = event_log.runs("pick_and_place")
+            self.assertEqual(len(runs), 1)
+            self.assertIsNotNone(runs[0][3])
+
+            run_events = event_log.events(run=runs[0][0])
+            self.assertEqual([event["name"] for event in run_events], ["Key Message", "Error Code Message", "Key Message"])
+
+        # The index persists across sessions, including the run still in progress
+        with EventLog(self.directory) as event_log:
+            self.assertEqual(len(event_log.events()), 6)
+            self.assertEqual(event_log.runs("palletizing")[0][0], event_log.current_run)
+
+    def test_code_is_qualified_by_message_type(self):
+        messages = [
+            create_error_code_message(204, 3),
+            create_key_message("PROGRAM_XXX_STARTED", "pick_and_place", code=204, argument=3)
+        ]
+        with EventLog(self.directory) as event_log:
+            for message in messages:
+                event_log.append(Package(message))
+
+            # Key Messages reuse code numbers, so code lookups default to Error Code Messages
+            self.assertEqual([event["name"] for event in event_log.events(code=204)], ["Error Code Message"])
+            self.assertEqual([event["name"] for event in event_log.events(code="C204A3", message_type=7)], ["Key Message"])
+            self.assertEqual(event_log.events(code="C204A1"), [])
+
+            with self.assertRaises(ValueError):
+                event_log.events(code="C204X")
+
+if __name__ == "__main__":
+    unittest.main()
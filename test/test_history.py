@@ -0,0 +1,82 @@
+# test_history.py
+
+import unittest
+import numpy as np
+from datetime import datetime, timedelta
+from client.history import RingHistory
+from client.package import Package
+from test.messages import *
+
+class TestRingHistory(unittest.TestCase):
+
+    def create_package(self, timestamp, temperature):
+        joint_temperatures = (30.0, temperature, 30.0, 30.0, 30.0, 30.0)
+        message = create_robot_state_message(
+            create_robot_mode_data(timestamp=timestamp),
+            create_joint_data(T_motor=joint_temperatures)
+        )
+        return Package(message)
+
+    def test_query_after_wrap(self):
+        history = RingHistory(4)
+
+        # Controller timestamps are in microseconds; 6 samples overflow the capacity of 4
+        for i in range(6):
+            history.append(self.create_package(i * 100000, 30.0 + i))
+
+        timestamps, values = history.query("Joint2_T_motor", 0.25, 0.45)
+
+        np.testing.assert_allclose(timestamps, [0.3, 0.4])
+        np.testing.assert_allclose(values, [33.0, 34.0])
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history.latest("Joint_Data_Joint2_T_motor"), 35.0)
+
+        # Results are views into the preallocated storage
+        self.assertFalse(values.flags.owndata)
+
+    def test_requested_fields_are_preallocated(self):
+        history = RingHistory(8, ["Joint_Data_Joint2_T_motor"])
+        self.assertEqual(history.nbytes(), 3 * 2 * 8 * 8 + 3 * 8)
+
+        history.append(self.create_package(0, 40.0))
+        _, values = history.query("Joint2_T_motor")
+        np.testing.assert_allclose(values, [40.0])
+
+    def test_requested_bare_names_are_resolved(self):
+        history = RingHistory(8, ["Joint2_T_motor"])
+        history.append(self.create_package(0, 40.0))
+
+        _, values = history.query("Joint2_T_motor")
+        np.testing.assert_allclose(values, [40.0])
+        self.assertEqual(history.fields, ["Joint_Data_Joint2_T_motor"])
+
+        with self.assertRaises(KeyError):
+            RingHistory(8, ["Not_A_Variable"]).append(self.create_package(0, 40.0))
+
+    def test_controller_restart_resets(self):
+        history = RingHistory(8)
+        for seconds in (5, 6, 7, 1, 2):
+            history.append(self.create_package(seconds * 1000000, 30.0 + seconds))
+
+        timestamps, values = history.query("Joint2_T_motor", 1.5, 6.5)
+        np.testing.assert_allclose(timestamps, [2.0])
+        np.testing.assert_allclose(values, [32.0])
+        self.assertEqual(history.resets, 1)
+    def test_received_clock_is_monotonic(self):
+        history = RingHistory(8)
+        wall_clock = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(4):
+            package = self.create_package(i * 100000, 30.0 + i)
+            package.received_monotonic = 100.0 + i * 0.1
+            # The wall clock steps back by an hour after the second package
+            package.received_timestamp = wall_clock + timedelta(seconds=i * 0.1) - timedelta(hours=i >= 2)
+            history.append(package)
+
+        timestamps, values = history.query("Joint2_T_motor", 100.05, 100.25, clock="received")
+
+        np.testing.assert_allclose(timestamps, [100.1, 100.2])
+        np.testing.assert_allclose(values, [31.0, 32.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
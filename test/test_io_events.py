@@ -0,0 +1,69 @@
+# test_io_events.py
+
+import unittest
+import numpy as np
+from client.io_events import *
+from client.package import Package
+from test.messages import *
+
+class TestIOEvents(unittest.TestCase):
+
+    def create_package(self, timestamp, digital_input_bits, digital_output_bits=0):
+        message = create_robot_state_message(
+            create_robot_mode_data(timestamp=timestamp),
+            create_master_board_data(digital_input_bits, digital_output_bits)
+        )
+        return Package(message)
+
+    def test_detector_edges(self):
+        words = [0b000, 0b101, 0b100, 0b100 | 1 << 16]
+        packages = [self.create_package(i * 100000, word) for i, word in enumerate(words)]
+        events = list(io_events(packages))
+
+        self.assertEqual(events, [
+            IOEvent(0.1, "digitalInputBits", 0, RISING),
+            IOEvent(0.1, "digitalInputBits", 2, RISING),
+            IOEvent(0.2, "digitalInputBits", 0, FALLING),
+            IOEvent(0.3, "digitalInputBits", 16, RISING)
+        ])
+        self.assertEqual(pin_name("digitalInputBits", 16), "TI0")
+
+    def test_vectorized_edges_match_detector(self):
+        rng = np.random.default_rng(7)
+        words = rng.integers(0, 1 << 18, size=50)
+        timestamps = np.arange(50) * 0.1
+
+        detector = IOEdgeDetector()
+        expected = []
+        for i, word in enumerate(words):
+            expected.extend(detector.process(self.create_package(i * 100000, int(word))))
+
+        events = edges(timestamps, words, "digitalInputBits")
+
+        self.assertEqual([event[1:] for event in events], [event[1:] for event in expected])
+        np.testing.assert_allclose([event.timestamp for event in events], [event.timestamp for event in expected])
+
+    def test_pulse_and_cycle_times(self):
+        words = [0, 2, 0, 0, 2, 2, 0]
+        events = edges(np.arange(7) * 0.5, words, "digitalOutputBits")
+
+        np.testing.assert_allclose(pulse_durations(events, "digitalOutputBits", 1), [0.5, 1.0])
+        np.testing.assert_allclose(cycle_times(events, "digitalOutputBits", 1), [1.5])
+
+    def test_non_finite_words(self):
+        words = np.array([np.nan, 4.0, 5.0, np.nan, 5.0, 4.0])
+        events = edges(np.arange(6) * 0.1, words, "digitalInputBits")
+
+        # NaN samples are dropped rather than read as a word of zeros
+        self.assertEqual([event[1:] for event in events], [
+            ("digitalInputBits", 0, RISING),
+            ("digitalInputBits", 0, FALLING)
+        ])
+        np.testing.assert_allclose([event.timestamp for event in events], [0.2, 0.5])
+
+        with self.assertRaises(ValueError):
+            unpack_bits(words)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# test_kinematics.py
+
+import math
+import unittest
+import numpy as np
+from client.kinematics import KinematicsEngine
+
+class TestKinematicsEngine(unittest.TestCase):
+
+    def create_engine(self):
+
+        # Nominal UR3e DH parameters
+        a = [0, -0.24355, -0.2132, 0, 0, 0]
+        d = [0.15185, 0, 0, 0.13105, 0.08535, 0.0921]
+        alpha = [math.pi/2, 0, 0, math.pi/2, -math.pi/2, 0]
+        return KinematicsEngine(a, d, alpha)
+
+    def test_forward_kinematics_zero_pose(self):
+        engine = self.create_engine()
+
+        # Evaluate a batch of identical zero poses
+        positions = engine.tcp_positions(np.zeros((3, 6)))
+
+        # At zero the TCP lies at (a2 + a3, -(d4 + d6), d1 - d5)
+        expected_position = [-0.45675, -0.22315, 0.0665]
+        for position in positions:
+            np.testing.assert_allclose(position, expected_position, atol=1e-9)
+
+    def test_process(self):
+        engine = self.create_engine()
+        timestamps = np.array([0.0, 0.1, 0.2])
+        q = np.zeros((3, 6))
+        q[:, 0] = [0.0, 0.1, 0.2]
+        current = np.full((3, 6), 2.0)
+        voltage = np.full((3, 6), 48.0)
+
+        result = engine.process(timestamps, q, current, voltage)
+
+        # Base rotation moves the TCP along an arc of radius sqrt(x^2 + y^2)
+        radius = math.hypot(-0.45675, -0.22315)
+        expected_speed = 2 * radius * math.sin(0.05) / 0.1
+        np.testing.assert_allclose(result.tcp_speed, [0.0, expected_speed, expected_speed])
+        np.testing.assert_allclose(result.joint_power, current * voltage)
+        np.testing.assert_allclose(result.energy[-1], np.full(6, 96.0 * 0.2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# test_latency.py
+
+import unittest
+import numpy as np
+from client.latency import LatencyEstimator
+
+class TestLatencyEstimator(unittest.TestCase):
+
+    PERIOD = 0.1
+
+    def test_drift(self):
+        estimator = LatencyEstimator()
+
+        # The host clock runs 50 ppm fast and starts 1000 s ahead of the controller
+        for i in range(600):
+            controller_timestamp = i * self.PERIOD
+            estimator.update(controller_timestamp, 1000.0 + controller_timestamp * (1 + 50e-6))
+
+        self.assertAlmostEqual(estimator.drift(), 50.0, places=3)
+        self.assertAlmostEqual(estimator.latency, 0.0, places=9)
+        self.assertEqual(estimator.gaps, 0)
+
+    def test_gap_and_dropped_count(self):
+        estimator = LatencyEstimator()
+        controller_timestamps = [i * self.PERIOD for i in range(20) if not 10 <= i < 14]
+        for controller_timestamp in controller_timestamps:
+            estimator.update(controller_timestamp, 5.0 + controller_timestamp)
+
+        self.assertAlmostEqual(estimator.expected_period, self.PERIOD)
+        self.assertEqual(estimator.gaps, 1)
+        self.assertEqual(estimator.dropped, 4)
+
+    def test_jitter_and_latency(self):
+        estimator = LatencyEstimator(expected_period=self.PERIOD)
+        rng = np.random.default_rng(11)
+        delays = rng.uniform(0.0, 0.004, size=2000)
+        delays[0] = 0.0
+        for i, delay in enumerate(delays):
+            controller_timestamp = i * self.PERIOD
+            estimator.update(controller_timestamp, 20.0 + controller_timestamp + delay)
+
+        # RFC 3550 jitter of uniform delays on [0, d] settles near the mean |difference|, d / 3
+        self.assertAlmostEqual(estimator.jitter, 0.004 / 3, delta=0.0004)
+        # The fastest delivery is judged with the early, noisier drift fit, so allow 1 ms
+        self.assertAlmostEqual(estimator.latency, delays[-1], delta=0.001)
+        self.assertLess(estimator.max_latency, 0.006)
+        self.assertAlmostEqual(abs(estimator.drift()), 0.0, delta=1.0)
+        self.assertEqual(sum(estimator.latency_histogram), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# test_layouts.py
+
+import struct
+import unittest
+# The client modules import each other as top-level modules, so the table registry they
+# share is that of `layouts`, not `client.layouts`.
+from layouts import *
+from client.decode_cache import DecodeCache
+from client.package import Package
+from client.pipeline import decode, extract
+from test.messages import *
+
+class TestLayoutDecoder(unittest.TestCase):
+
+    def setUp(self):
+        # A test-only table for version 6.0 that sends the TCP offset ahead of the TCP pose.
+        fields = CartesianInfoStructure._fields
+        layouts = [layout for layout in E_SERIES_LAYOUTS if layout.subpackage_type != 4]
+        layouts.append(SubPackageLayout(4, CartesianInfo, "Cartesian Info", '>dddddddddddd', fields[6:] + fields[:6], {}, {}))
+        register_layout_table((6, 0), layouts)
+
+    def tearDown(self):
+        del LAYOUT_TABLES[(6, 0)]
+        del LAYOUT_DECODERS[(6, 0)]
+
+    def create_message(self, euromap_installed):
+        return create_robot_state_message(
+            create_robot_mode_data(timestamp=2500000, is_protective_stopped=True),
+            create_joint_data(q_actual=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6)),
+            create_cartesian_info(pose=(0.5, -0.25, 0.75, 0.0, 3.0, 0.0)),
+            create_master_board_data(digital_input_bits=9, euromap_installed=euromap_installed)
+        )
+
+    def create_version_message(self, major, minor):
+        project_name = b"URControl"
+        body = struct.pack('>b', len(project_name)) + project_name + struct.pack('>BBii', major, minor, 3, 1234) + b"01-01-2024"
+        return create_robot_message(3, body)
+
+    def test_matches_subpackage_classes(self):
+        layout = LayoutDecoder((5, 0))
+        for euromap_installed in (False, True):
+            message = self.create_message(euromap_installed)
+            expected = Package(message)
+            package = Package(message, layout=layout)
+
+            self.assertEqual(package.get_flattened_variables(), expected.get_flattened_variables())
+            self.assertEqual([str(subpackage) for subpackage in package.subpackage_list],
+                             [str(subpackage) for subpackage in expected.subpackage_list])
+
+    def test_version_message_switches_table(self):
+        layout = LayoutDecoder()
+        decode_cache = DecodeCache(subpackage_types={(16, 4)})
+        frames = [
+            self.create_version_message(5, 11), self.create_message(False),
+            self.create_version_message(6, 2), self.create_message(False)
+        ]
+        packages = list(decode(frames, decode_cache, layout))
+
+        # The same bytes decode differently once the 6.0 table is selected, and are not reused
+        self.assertEqual(packages[1].get_subpackage("Cartesian Info").subpackage_variables.X, 0.5)
+        self.assertEqual(packages[3].get_subpackage("Cartesian Info").subpackage_variables.TCPOffsetX, 0.5)
+        self.assertEqual(layout.version, (6, 0))
+        self.assertEqual(layout.controller_version, (6, 2, 3, 1234))
+        self.assertEqual(decode_cache.hits, 0)
+
+    def test_extract_follows_version(self):
+        layout = LayoutDecoder()
+        frames = [
+            self.create_version_message(5, 11), self.create_message(False),
+            self.create_version_message(6, 2), self.create_message(False)
+        ]
+        rows = list(extract(frames, ["Cartesian_Info_X"], layout))
+
+        self.assertEqual([row["Cartesian_Info_X"] for row in rows], [0.5, 0.0])
+
+    def test_unknown_length_is_not_decoded(self):
+        truncated = create_subpackage_data('>Q????????Bddd', 0, (0, True, True, True, False, False, True, False, 7, 0, 1.0, 1.0, 1.0))
+        package = Package(create_robot_state_message(truncated), layout=LayoutDecoder())
+
+        self.assertTrue(package.subpackage_list[0].subpackage_name.startswith("UnknownSubPackage"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# test_live_view.py
+
+import http.client
+import json
+import time
+import unittest
+from client.live_view import LiveViewServer
+from client.package import Package
+from test.messages import *
+
+class TestLiveViewServer(unittest.TestCase):
+
+    def create_package(self, x, y):
+        message = create_robot_state_message(create_cartesian_info(pose=(x, y, 0.3, 0.0, 3.0, 0.0)))
+        return Package(message)
+
+    def wait_for_broadcast(self, server, timeout=5.0):
+        # The broadcaster takes pending changes and its client list under the same lock.
+        deadline = time.monotonic() + timeout
+        while True:
+            with server.lock:
+                if not server.pending:
+                    return
+            self.assertLess(time.monotonic(), deadline, "The broadcaster did not take the pending changes")
+            time.sleep(0.01)
+
+    def read_event(self, response):
+        # Skips keep-alive comments and returns the next data event.
+        while True:
+            line = response.fp.readline().decode().strip()
+            if line.startswith("data: "):
+                return json.loads(line[len("data: "):])
+
+    def test_snapshot_then_changes(self):
+        with LiveViewServer(port=0, refresh_rate=20.0) as server:
+            server.publish(self.create_package(0.5, 0.25))
+
+            # The first package is flushed before the browser subscribes, so it is only in the snapshot.
+            self.wait_for_broadcast(server)
+            connection = http.client.HTTPConnection(*server.address, timeout=5)
+            connection.request("GET", "/events?fields=X,Y")
+            response = connection.getresponse()
+            self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+
+            self.assertEqual(self.read_event(response), {"Cartesian_Info_X": 0.5, "Cartesian_Info_Y": 0.25})
+
+            server.publish(self.create_package(0.75, 0.25))
+            self.assertEqual(self.read_event(response), {"Cartesian_Info_X": 0.75})
+            connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
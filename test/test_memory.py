@@ -0,0 +1,101 @@
+# test_memory.py
+
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout
+from client.memory import MemoryAccountant, package_nbytes
+from client.package import Package
+from client.package_writer import PackageWriter
+from client.history import RingHistory
+from test.messages import *
+
+class TestMemoryAccounting(unittest.TestCase):
+
+    def setUp(self):
+        # PackageWriter writes to ./output and prints counts to the console.
+        self.previous_directory = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        self.console = open(os.devnull, "w")
+
+    def tearDown(self):
+        os.chdir(self.previous_directory)
+        self.directory.cleanup()
+        self.console.close()
+
+    def create_messages(self, count):
+        return [create_robot_state_message(
+            create_robot_mode_data(timestamp=i * 100000),
+            create_joint_data(q_actual=(i * 0.001,) * 6),
+            create_cartesian_info(pose=(i * 0.01, 0.2, 0.3, 0.0, 3.0, 0.0)),
+            create_master_board_data(digital_input_bits=i)
+        ) for i in range(count)]
+
+    def traced_growth(self, function):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            result = function()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return after - before, result
+
+    def test_package_nbytes_matches_tracemalloc(self):
+        messages = self.create_messages(100)
+        Package(messages[0])
+
+        growth, packages = self.traced_growth(lambda: [Package(message) for message in messages])
+
+        estimate = sum(package_nbytes(package) for package in packages)
+        self.assertAlmostEqual(estimate / growth, 1.0, delta=0.25)
+
+    def test_writer_accounting_matches_tracemalloc(self):
+        packages = [Package(message) for message in self.create_messages(50)]
+        with redirect_stdout(self.console):
+            writer = PackageWriter(50, False)
+            writer.append_package_to_file(packages[0])
+            growth, _ = self.traced_growth(lambda: [writer.append_package_to_file(package) for package in packages[1:]])
+
+        per_message = growth / 49
+        accounted = writer.memory_total() / len(writer.package_deques[16])
+        self.assertAlmostEqual(accounted / per_message, 1.0, delta=0.2)
+
+    def test_budget_evicts_and_spills(self):
+        packages = [Package(message) for message in self.create_messages(10)]
+        with redirect_stdout(self.console):
+            report_size = sys.getsizeof(f"{packages[0]}\n{'#' * 80}\n")
+            writer = PackageWriter(50, False, memory_budget=3 * report_size, spill=True)
+            for package in packages:
+                writer.append_package_to_file(package)
+
+        self.assertLessEqual(writer.memory_total(), writer.memory_budget)
+        self.assertEqual(writer.evicted + len(writer.package_deques[16]), 10)
+        with open(os.path.join("output", "spill", "robot_state.txt")) as file:
+            self.assertEqual(file.read().count("#" * 80), writer.spilled)
+
+    def test_writer_without_reports(self):
+        with redirect_stdout(self.console):
+            writer = PackageWriter(0, False)
+            for package in [Package(message) for message in self.create_messages(3)]:
+                writer.append_package_to_file(package)
+
+        self.assertEqual(writer.memory_total(), 0)
+
+    def test_accountant_totals_per_robot(self):
+        accountant = MemoryAccountant()
+        for robot in ("left", "right"):
+            history = accountant.register(RingHistory(100, ["Cartesian_Info_X"]), robot)
+            history.append(Package(self.create_messages(1)[0]))
+
+        totals = accountant.totals("robot")
+        self.assertEqual(set(totals), {"left", "right"})
+        self.assertEqual(accountant.total(), 2 * history.nbytes())
+        self.assertIn("history", str(accountant))
+
+
+if __name__ == '__main__':
+    unittest.main()
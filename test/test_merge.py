@@ -0,0 +1,44 @@
+# test_merge.py
+
+import unittest
+from client.merge import TimedSample, merge_streams, align_asof
+
+class TestMerge(unittest.TestCase):
+
+    def create_stream(self, robot, timestamps):
+        return (TimedSample(timestamp, robot, {"value": index}) for index, timestamp in enumerate(timestamps))
+
+    def test_merge_streams_order(self):
+        merged = list(merge_streams(
+            self.create_stream("a", [0.0, 0.2, 0.4]),
+            self.create_stream("b", [0.1, 0.2, 0.5]),
+            self.create_stream("c", [0.3])
+        ))
+
+        self.assertEqual([sample.timestamp for sample in merged], [0.0, 0.1, 0.2, 0.2, 0.3, 0.4, 0.5])
+
+        # Equal timestamps keep the order of their streams
+        self.assertEqual([sample.robot for sample in merged[2:4]], ["a", "b"])
+
+    def test_align_asof_tolerance(self):
+        samples = merge_streams(
+            self.create_stream("a", [0.0, 0.1, 0.2, 0.3]),
+            self.create_stream("b", [0.05])
+        )
+        ticks = list(align_asof(samples, 0.1, start=0.0, tolerance=0.1))
+
+        self.assertEqual([sorted(aligned) for _, aligned in ticks], [["a"], ["a", "b"], ["a"], ["a"]])
+        self.assertEqual(ticks[1][1]["b"].timestamp, 0.05)
+
+    def test_align_asof_ticks(self):
+        samples = self.create_stream("a", [1000.0 + i * 0.1 for i in range(40)])
+        ticks = [tick for tick, _ in align_asof(samples, 0.1, start=0.0)]
+
+        # The first tick is at the first sample, and ticks are multiples of the period
+        self.assertEqual(ticks[0], 10000 * 0.1)
+        self.assertEqual(ticks, [(10000 + n) * 0.1 for n in range(len(ticks))])
+        self.assertEqual(len(ticks), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
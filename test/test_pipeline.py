@@ -0,0 +1,69 @@
+# test_pipeline.py
+
+import time
+import unittest
+from client.pipeline import Framer, frame, decode, project, batch, unbatch, Pipeline
+from test.messages import *
+
+class TestFramer(unittest.TestCase):
+
+    def create_messages(self):
+        return [create_robot_state_message(
+            create_robot_mode_data(timestamp=i * 100000),
+            create_cartesian_info(pose=(i * 0.1, 0.0, 0.0, 0.0, 0.0, 0.0))
+        ) for i in range(3)]
+
+    def test_split_chunks(self):
+        message = self.create_messages()[0]
+        framer = Framer()
+
+        # Neither the length header nor the body arrive whole
+        self.assertEqual(framer.feed(message[:2]), [])
+        self.assertEqual(framer.feed(message[2:20]), [])
+        self.assertEqual(framer.feed(message[20:]), [message])
+        self.assertEqual(len(framer.buffer), 0)
+
+    def test_several_messages_in_one_chunk(self):
+        messages = self.create_messages()
+        stream = b''.join(messages)
+        chunks = [stream[:len(messages[0]) + 7], stream[len(messages[0]) + 7:]]
+
+        self.assertEqual(list(frame(chunks)), messages)
+
+    def test_receive_time(self):
+        stream = b''.join(self.create_messages())
+        chunks = [stream[:-10], stream[-10:]]
+        times = iter([1.0, 2.0])
+        framer = Framer()
+
+        frames = framer.feed(chunks[0], next(times)) + framer.feed(chunks[1], next(times))
+        packages = list(decode(frames))
+
+        # Frames completed by one chunk share its receive time, however long decoding takes
+        self.assertEqual([package.received_monotonic for package in packages], [1.0, 1.0, 2.0])
+
+    def test_receive_time_not_delayed_by_consumer(self):
+        stream = b''.join(self.create_messages())
+        packages = []
+        for package in decode(frame([stream])):
+            packages.append(package)
+            time.sleep(0.05)
+
+        self.assertEqual(len({package.received_monotonic for package in packages}), 1)
+
+    def test_invalid_length(self):
+        with self.assertRaises(ValueError):
+            Framer().feed(b'\x00\x00\x00\x02\x10')
+
+    def test_pipeline_between_batches(self):
+        stream = b''.join(self.create_messages())
+        chunks = [stream[i:i + 50] for i in range(0, len(stream), 50)]
+
+        rows = Pipeline(chunks).then(frame).then(decode).then(project, ["X"]).then(batch, 2).into(list)
+
+        self.assertEqual([len(group) for group in rows], [2, 1])
+        self.assertEqual([row["X"] for row in unbatch(rows)], [0.0, 0.1, 0.2])
+
+
+if __name__ == '__main__':
+    unittest.main()
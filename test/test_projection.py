@@ -0,0 +1,44 @@
+# test_projection.py
+
+import unittest
+from client.projection import FieldProjection
+from client.package import Package
+from test.messages import *
+
+class TestFieldProjection(unittest.TestCase):
+
+    def create_message(self, euromap_installed):
+        return create_robot_state_message(
+            create_robot_mode_data(timestamp=1500000, speed_scaling=0.5),
+            create_joint_data(q_actual=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6), T_motor=(31.0, 32.0, 33.0, 34.0, 35.0, 36.0)),
+            create_cartesian_info(pose=(0.5, -0.25, 0.75, 0.0, 3.0, 0.0)),
+            create_master_board_data(digital_input_bits=5, euromap_installed=euromap_installed)
+        )
+
+    def test_matches_package_variables(self):
+        for euromap_installed in (False, True):
+            message = self.create_message(euromap_installed)
+            expected = Package(message).get_flattened_variables()
+            projection = FieldProjection(list(expected))
+
+            self.assertEqual(projection.extract(message), tuple(expected.values()))
+
+    def test_bare_names_and_missing_subpackages(self):
+        projection = FieldProjection(["X", "Joint3_T_motor", "euromapInputBits", "calibration_status"])
+        values = projection.extract(self.create_message(False))
+
+        self.assertEqual(projection.flattened_names[0], "Cartesian_Info_X")
+        self.assertEqual(values, (0.5, 33.0, "Not used", None))
+
+    def test_ignores_other_package_types(self):
+        projection = FieldProjection(["X"])
+
+        self.assertIsNone(projection.extract(create_key_message("PROGRAM_XXX_STARTED", "test")))
+
+    def test_unknown_field(self):
+        with self.assertRaises(KeyError):
+            FieldProjection(["Not_A_Variable"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+# test_realtime.py
+
+import math
+import unittest
+from client.realtime import *
+
+class TestRealtimeClient(unittest.TestCase):
+
+    def test_receive_from_stand_in(self):
+        with RealtimeServer(frequency=500) as server, RealtimeClient(*server.address) as client:
+
+            # The stand-in starts every client at sample 0 and advances by 1/500 s
+            for sample in range(50):
+                state = client.receive()
+                self.assertAlmostEqual(state.time, sample / 500)
+
+            self.assertEqual(state.length, 1116)
+            self.assertEqual(state.Robot_Mode, 7.0)
+            for joint in range(6):
+                self.assertAlmostEqual(state.q_actual[joint], math.sin(state.time + joint))
+
+    def test_poll_several_clients(self):
+        with RealtimeServer(frequency=500) as server:
+            clients = [RealtimeClient(*server.address) for _ in range(3)]
+            counts = {client: 0 for client in clients}
+
+            for client, state in poll_clients(clients, timeout=1):
+                counts[client] += 1
+                if min(counts.values()) >= 20:
+                    break
+
+            for client in clients:
+                client.close()
+            self.assertTrue(all(count >= 20 for count in counts.values()))
+
+    def test_decode_older_layout(self):
+        server = RealtimeServer(layout=REALTIME_LAYOUTS[0])
+        state = RealtimeState()
+
+        self.assertTrue(state.decode(server.create_message(5)))
+        self.assertEqual(state.length, 1108)
+        self.assertAlmostEqual(state.time, 0.01)
+        self.assertNotIn("Safety_Status", state.get_flattened_variables())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+# test_rtde.py
+
+import math
+import os
+import unittest
+from client.rtde import *
+
+class TestRTDEClient(unittest.TestCase):
+
+    def test_recipe_subscription(self):
+        watch_list = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "client", "rtde_watch_list.txt")
+        variables = read_recipe(watch_list)
+
+        with RTDEServer() as server, RTDEClient(*server.address) as client:
+            self.assertTrue(client.negotiate_protocol_version())
+            self.assertEqual(client.get_controller_version(), (5, 9, 0, 0))
+
+            recipe = client.setup_outputs(variables, frequency=500)
+            self.assertIn("actual_q_6", recipe.names)
+            self.assertTrue(client.start())
+
+            # The stand-in advances timestamp by 1/500 s from 0
+            for sample in range(10):
+                row = client.receive()
+                self.assertAlmostEqual(row["timestamp"], sample / 500)
+                self.assertAlmostEqual(row["actual_q_2"], math.sin(row["timestamp"] + 1))
+                self.assertEqual(row["robot_mode"], 7)
+
+            self.assertTrue(client.pause())
+
+    def test_unknown_output_is_rejected(self):
+        with RTDEServer() as server, RTDEClient(*server.address) as client:
+            client.negotiate_protocol_version()
+            with self.assertRaises(ValueError):
+                client.setup_outputs(["timestamp", "not_a_variable"])
+
+if __name__ == "__main__":
+    unittest.main()
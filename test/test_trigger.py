@@ -0,0 +1,54 @@
+# test_trigger.py
+
+import os
+import tempfile
+import unittest
+from client.trigger import TriggerEngine, TriggerRule
+from client.bulk_decode import scan_frame_offsets
+from client.package import Package
+from test.messages import *
+
+class TestTriggerEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_package(self, timestamp, temperature):
+        message = create_robot_state_message(
+            create_robot_mode_data(timestamp=timestamp),
+            create_joint_data(T_motor=(30.0, temperature, 30.0, 30.0, 30.0, 30.0))
+        )
+        return Package(message)
+
+    def test_fires_on_edge_and_captures(self):
+        rule = TriggerRule("hot/joint 2", "Joint2_T_motor > 60", post_trigger_frames=2)
+        temperatures = [50.0, 65.0, 70.0, 55.0, 50.0, 66.0]
+
+        with TriggerEngine([rule], pre_trigger_frames=2, output_directory=self.directory.name) as engine:
+            fired = [engine.process(self.create_package(i * 100000, temperature)) for i, temperature in enumerate(temperatures)]
+
+        # Fires when the condition becomes true and re-arms once it is false again
+        self.assertEqual([len(rules) for rules in fired], [0, 1, 0, 0, 0, 1])
+        self.assertEqual(rule.fired, 2)
+        self.assertEqual(engine.flattenings, 6)
+
+        # The first capture holds the one earlier frame, the trigger and 2 frames; the second is
+        # written by close() with 2 earlier frames and the trigger
+        self.assertEqual(len(engine.captures), 2)
+        frame_counts = [len(scan_frame_offsets(path)) for path in engine.captures]
+        self.assertEqual(frame_counts, [4, 3])
+        for path in engine.captures:
+            self.assertEqual(os.path.dirname(path), self.directory.name)
+            self.assertTrue(os.path.basename(path).startswith("hot_joint_2_"))
+        self.assertIn("FLATTENING: 6 packages", engine.report())
+
+    def test_rejects_unsupported_syntax(self):
+        with self.assertRaises(ValueError):
+            TriggerRule("import", "__import__('os')")
+
+
+if __name__ == '__main__':
+    unittest.main()
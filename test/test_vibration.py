@@ -0,0 +1,46 @@
+# test_vibration.py
+
+import unittest
+import numpy as np
+from client.vibration import *
+from client.package import Package
+from test.messages import *
+
+class TestSpectralAnalyzer(unittest.TestCase):
+
+    def test_sinusoid_energy_in_band(self):
+        times = np.arange(256) / 10.0
+        currents = 1.5 + 2.0 * np.sin(2 * np.pi * 2.0 * times)
+
+        energies = band_energies(currents, window=64, hop=32)
+
+        # A sinusoid of amplitude 2 at 2 Hz holds 2**2 / 2 in the 1.5-3 Hz band
+        np.testing.assert_allclose(energies[:, 2], 2.0, rtol=0.01)
+        self.assertTrue(np.all(energies[:, [0, 1, 3]] < 0.01))
+
+    def test_streaming_matches_offline(self):
+        analyzer = SpectralAnalyzer(window=32, hop=8)
+        rng = np.random.default_rng(3)
+        currents = rng.normal(size=(80, 6))
+
+        rows = []
+        for i, current in enumerate(currents):
+            message = create_robot_state_message(
+                create_robot_mode_data(timestamp=i * 100000),
+                create_joint_data(I_actual=current)
+            )
+            rows.extend(vibration_features([Package(message)], analyzer))
+
+        # Joint Data carries currents as 32 bit floats
+        expected = band_energies(currents.astype(np.float32), window=32, hop=8)
+        self.assertEqual(len(rows), len(expected))
+        self.assertAlmostEqual(rows[0]["controller_timestamp"], 3.1)
+        np.testing.assert_allclose([row["Joint4_I_actual_band2"] for row in rows], expected[:, 3, 2], rtol=1e-6)
+
+    def test_invalid_hop(self):
+        with self.assertRaises(ValueError):
+            SpectralAnalyzer(window=32, hop=64)
+
+
+if __name__ == '__main__':
+    unittest.main()